@@ -0,0 +1,264 @@
+# batch.py
+"""Score many resumes against many job descriptions.
+
+Each resume is extracted and cleaned once (in a process pool) and each JD is read once;
+every (resume, JD) pair is then scored and streamed to a JSONL or CSV file as soon as it
+is ready. Pairs already scored in the output file are skipped, so an interrupted run
+can simply be restarted with the same arguments.
+"""
+import csv
+import glob
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, List, Set, Tuple
+
+from utils.results import dumps_text
+
+RESUME_EXTS = (".pdf", ".docx", ".doc", ".txt")
+JD_EXTS = (".txt", ".md")
+CSV_FIELDS = ["resume", "jd", "keyword_pct", "semantic_pct", "combined_match_pct", "llm_match_pct", "error"]
+
+
+def expand_paths(patterns: Iterable[str], exts: Tuple[str, ...]) -> List[str]:
+    """Expand files, directories and glob patterns into a sorted list of matching files."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        for path in candidates:
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in exts:
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def load_completed(output: str) -> Set[Tuple[str, str]]:
+    """(resume, jd) pairs already scored by a previous run; errored rows are retried."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8", newline="") as f:
+        if output.endswith(".csv"):
+            for row in csv.DictReader(f):
+                if row.get("resume") and row.get("jd") and not row.get("error"):
+                    done.add((row["resume"], row["jd"]))
+        else:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # partial line from a crash
+                if not row.get("error"):
+                    done.add((row["resume"], row["jd"]))
+    return done
+
+
+class _ResultWriter:
+    """Append-only JSONL/CSV writer that flushes every row."""
+
+    def __init__(self, output: str):
+        self.is_csv = output.endswith(".csv")
+        is_new = not os.path.exists(output) or os.path.getsize(output) == 0
+        if not is_new:
+            # terminate a partially written last line before appending
+            with open(output, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._f = open(output, "a", encoding="utf-8", newline="")
+        if not is_new and needs_newline:
+            self._f.write("\n")
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if is_new:
+                self._csv.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self.is_csv:
+            flat = dict(row)
+            match = (row.get("llm") or {}).get("match_chain")
+            pct = getattr(match, "match_pct", None)
+            flat["llm_match_pct"] = "" if pct is None else pct
+            self._csv.writerow(flat)
+        else:
+            self._f.write(dumps_text(row) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _extract(path: str, chunk: bool = True):
+    """Worker: extract, clean and (unless `chunk` is false) chunk one resume."""
+    try:
+        from main import load_resume_text, split_chunks
+        from extractor.text_utils import clean_text
+        cleaned = clean_text(load_resume_text(path))
+        # the same token-budgeted chunks as main and the service, so scores agree
+        return path, cleaned, split_chunks(cleaned)[1] if chunk else None, None
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+def _bounded(executor, fn, items: Iterable, limit: int):
+    """Like executor.map, but unordered and with at most `limit` tasks in flight."""
+    items = iter(items)
+    pending = set()
+    while True:
+        for item in items:
+            pending.add(executor.submit(fn, item))
+            if len(pending) >= limit:
+                break
+        if not pending:
+            return
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in finished:
+            yield fut.result()
+
+
+def score_resume(cleaned: str, chunks: List[str], jds: dict, jd_vectors=None, jd_indexes: dict = None) -> dict:
+    """Keyword/semantic scores for one resume against every JD, keyed by JD path.
+
+    Semantic scores for all JDs come from one sparse matmul (see semantic_score_matrix).
+    `jd_vectors` are the JDs embedded once with the shared model; without a shared model
+    a vectorizer is fitted on this resume's chunks, like the single-resume FAISS path.
+    `jd_indexes` holds a precompiled JobKeywordIndex per JD path.
+    """
+    from embeddings.tfidf import get_shared_vectorizer, new_vectorizer
+    from utils.scoring import JobKeywordIndex, semantic_score_matrix, combined_score
+
+    jd_paths = list(jds)
+    semantic = [0.0] * len(jd_paths)
+    if chunks:
+        shared = get_shared_vectorizer()
+        try:
+            if shared is not None and jd_vectors is not None:
+                vectorizer = shared
+            else:
+                vectorizer = new_vectorizer().fit(chunks)
+                jd_vectors = vectorizer.transform([jds[p] for p in jd_paths])
+            semantic = semantic_score_matrix(vectorizer, [chunks], jd_vectors)[0].tolist()
+        except ValueError:
+            pass  # empty vocabulary: nothing to compare
+
+    if jd_indexes is None:
+        jd_indexes = {p: JobKeywordIndex(jds[p]) for p in jd_paths}
+    scores = {}
+    for jd_path, semantic_pct in zip(jd_paths, semantic):
+        keyword_pct, _ = jd_indexes[jd_path].score(cleaned)
+        scores[jd_path] = {
+            "keyword_pct": keyword_pct,
+            "semantic_pct": semantic_pct,
+            "combined_match_pct": combined_score(keyword_pct, semantic_pct),
+        }
+    return scores
+
+
+def run_batch(resume_patterns: Iterable[str], jd_patterns: Iterable[str], output: str,
+              provider: str = "openai", fused: bool = False, workers: int = 4, llm_workers: int = 4,
+              batch_api: bool = False) -> int:
+    """Score every resume against every JD, streaming rows to `output`. Returns rows written.
+
+    With `batch_api`, LLM analyses go through the provider's batch endpoint instead: rows
+    are held until the batch job finishes and written at the end.
+    """
+    resumes = expand_paths(resume_patterns, RESUME_EXTS)
+    jd_paths = expand_paths(jd_patterns, JD_EXTS)
+    jds = {}
+    for path in jd_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            jds[path] = f.read()
+
+    # with a shared embedding model every JD is embedded exactly once
+    jd_vectors = None
+    if jds:
+        from embeddings.tfidf import get_shared_vectorizer
+        shared = get_shared_vectorizer()
+        if shared is not None:
+            jd_vectors = shared.transform(list(jds.values()))
+
+    from utils.scoring import JobKeywordIndex
+    jd_indexes = {path: JobKeywordIndex(text) for path, text in jds.items()}
+
+    done = load_completed(output)
+    todo = [r for r in resumes if any((r, jd) not in done for jd in jd_paths)]
+
+    analyzer = None
+    if llm_workers > 0:
+        from main import get_analyzer
+        from chains.rate_limit import BATCH
+        analyzer = get_analyzer(provider, fused)
+
+    writer = _ResultWriter(output)
+    written = 0
+    llm_pending = {}  # future -> rows of one resume waiting for their LLM analyses
+    deferred = {}  # batch_api: item id -> (row, cleaned resume, JD text)
+
+    def drain(block_until: int):
+        nonlocal written
+        while len(llm_pending) > block_until:
+            finished, _ = wait(llm_pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                rows = llm_pending.pop(fut)
+                try:
+                    for row, analysis in zip(rows, fut.result()):
+                        row["llm"] = analysis
+                except Exception as e:
+                    for row in rows:
+                        row["error"] = f"{type(e).__name__}: {e}"
+                for row in rows:
+                    writer.write(row)
+                written += len(rows)
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as extract_pool, \
+                ThreadPoolExecutor(max_workers=max(1, llm_workers)) as llm_pool:
+            for path, cleaned, chunks, error in _bounded(extract_pool, _extract, todo, 2 * max(1, workers)):
+                if error is None:
+                    try:
+                        scores = score_resume(cleaned, chunks, jds, jd_vectors, jd_indexes)
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"
+                llm_rows = []
+                for jd_path in jd_paths:
+                    if (path, jd_path) in done:
+                        continue
+                    row = {"resume": path, "jd": jd_path}
+                    if error is not None:
+                        row["error"] = error
+                    else:
+                        row.update(scores[jd_path])
+                    if analyzer is None or error is not None:
+                        writer.write(row)
+                        written += 1
+                        continue
+                    if batch_api:
+                        deferred[str(len(deferred))] = (row, cleaned, jds[jd_path])
+                        continue
+                    llm_rows.append(row)
+                if llm_rows:
+                    # one task per resume: summary/skills/strengths are requested once and
+                    # only the match runs per JD; queued behind interactive analyses
+                    llm_pending[llm_pool.submit(analyzer.analyze_for_jobs, cleaned,
+                                                [jds[row["jd"]] for row in llm_rows],
+                                                priority_level=BATCH)] = llm_rows
+                    drain(2 * llm_workers)
+            drain(0)
+        if deferred:
+            job_error = None
+            try:
+                analyses = analyzer.analyze_batch({k: (c, jd) for k, (_, c, jd) in deferred.items()})
+            except Exception as e:
+                analyses, job_error = {}, f"{type(e).__name__}: {e}"
+            for item_id, (row, _, _) in deferred.items():
+                analysis = analyses.get(item_id) or {"error": job_error or "missing from batch results"}
+                if "error" in analysis:
+                    row["error"] = analysis["error"]
+                else:
+                    row["llm"] = analysis
+                writer.write(row)
+                written += 1
+    finally:
+        writer.close()
+    return written
@@ -1,13 +1,49 @@
 # chains/analysis_chain.py
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import contextvars
 import os
 import json
+import random
+import threading
+import time
+
+from chains.cache import get_default_cache, make_key
+from chains.rate_limit import OUTPUT_TOKEN_ESTIMATE, get_scheduler, priority
+from chains.token_budget import TokenUsage, context_budget, count_tokens, fit_context
+from utils import tracing
+from utils.results import Match, Skills
 
 MODEL_NAME = "gpt-4o-mini"  # pick available model
 GOOGLE_MODEL_NAME = "gemini-pro"  # Google Gemini model (or try gemini-pro for free tier)
 
 # Raw prompt strings — PromptTemplate and LLMChain will be created at init-time
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+_SKILLS_SCHEMA = {
+    "type": "object",
+    "properties": {"skills": _STRING_LIST, "experience_bullets": _STRING_LIST},
+    "required": ["skills", "experience_bullets"],
+    "additionalProperties": False,
+}
+_MATCH_SCHEMA = {
+    "type": "object",
+    "properties": {"match_pct": {"type": "number"}, "explanation": {"type": "string"}},
+    "required": ["match_pct", "explanation"],
+    "additionalProperties": False,
+}
+_FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {"summary": {"type": "string"}, "skills": _SKILLS_SCHEMA, "strengths": {"type": "string"},
+                   "match_pct": {"type": "number"}, "explanation": {"type": "string"}},
+    "required": ["summary", "skills", "strengths", "match_pct", "explanation"],
+    "additionalProperties": False,
+}
+
+# Prompts with a "schema" ask the provider for JSON output matching it (see _response_format)
 _SKILLS_PROMPT = {
+    "name": "skills",
+    "schema": _SKILLS_SCHEMA,
     "input_variables": ["context"],
     "template": (
         "You are a helpful assistant that extracts skills and experience bullets from resume text.\n"
@@ -17,11 +53,13 @@ _SKILLS_PROMPT = {
 }
 
 _SUMMARY_PROMPT = {
+    "name": "summary",
     "input_variables": ["context"],
     "template": ("Summarize the candidate experience in 3-5 sentences.\nContext: {context}"),
 }
 
 _STRENGTHS_PROMPT = {
+    "name": "strengths",
     "input_variables": ["context"],
     "template": (
         "Based on this resume context, list strengths and weaknesses (3 each) and provide short actionable suggestions.\nContext: {context}"
@@ -29,6 +67,8 @@ _STRENGTHS_PROMPT = {
 }
 
 _MATCH_PROMPT = {
+    "name": "match",
+    "schema": _MATCH_SCHEMA,
     "input_variables": ["resume_summary", "job_description"],
     "template": (
         "Compare the resume and the job description. Provide: \n"
@@ -38,22 +78,219 @@ _MATCH_PROMPT = {
     ),
 }
 
+_FUSED_PROMPT = {
+    "name": "fused",
+    "schema": _FUSED_SCHEMA,
+    "input_variables": ["context", "job_description"],
+    "template": (
+        "You are a helpful assistant that analyzes a resume against a job description.\n"
+        "Resume: {context}\n"
+        "Job description: {job_description}\n"
+        "Return a single JSON object with keys:\n"
+        "summary (string, 3-5 sentences summarizing the candidate experience),\n"
+        "skills (object with keys skills (list) and experience_bullets (list)),\n"
+        "strengths (string listing strengths and weaknesses (3 each) with short actionable suggestions),\n"
+        "match_pct (number 0-100), explanation (string, brief explanation of matches & gaps)."
+    ),
+}
+
+
+JSON_RETRIES = 1  # extra calls for a structured prompt whose output does not match its schema
+_json_decoder = json.JSONDecoder()
+
+
+def _parse_json(out: str):
+    """Parse the JSON value in model output, tolerating ```json fences and surrounding prose.
+
+    Tries the whole text first, then raw-decodes from each "{" / "[" in turn, so a single
+    left-to-right scan finds the first complete JSON object or array. Raises ValueError
+    when there is none.
+    """
+    text = out.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    pos = 0
+    while True:
+        starts = [i for i in (text.find("{", pos), text.find("[", pos)) if i != -1]
+        if not starts:
+            raise ValueError("no JSON value in model output")
+        pos = min(starts)
+        try:
+            return _json_decoder.raw_decode(text, pos)[0]
+        except ValueError:
+            pos += 1
+
+
+_JSON_TYPES = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": int,
+               "boolean": bool}
+
+
+def _matches_schema(data, schema: Dict) -> bool:
+    """Check `data` against the subset of JSON Schema used by the prompt schemas
+    (type, properties, required, items); unknown keys are tolerated."""
+    expected = schema.get("type")
+    if expected is not None:
+        if not isinstance(data, _JSON_TYPES[expected]):
+            return False
+        if expected in ("number", "integer") and isinstance(data, bool):
+            return False
+    if isinstance(data, dict):
+        if any(key not in data for key in schema.get("required", ())):
+            return False
+        return all(_matches_schema(data[key], sub) for key, sub in schema.get("properties", {}).items()
+                   if key in data)
+    if isinstance(data, list) and "items" in schema:
+        return all(_matches_schema(item, schema["items"]) for item in data)
+    return True
+
+
+def _gemini_schema(schema: Dict) -> Dict:
+    """Gemini's responseSchema: an OpenAPI subset with upper-case types and no additionalProperties."""
+    out = {"type": schema["type"].upper()}
+    if "properties" in schema:
+        out["properties"] = {k: _gemini_schema(v) for k, v in schema["properties"].items()}
+        out["required"] = list(schema.get("required", ()))
+    if "items" in schema:
+        out["items"] = _gemini_schema(schema["items"])
+    return out
+
+
+def _generation_config(schema: Dict) -> Dict:
+    """Gemini generationConfig constraining the reply to `schema`."""
+    return {"responseMimeType": "application/json", "responseSchema": _gemini_schema(schema)}
+
+
+def _response_format(prompt_def: Dict) -> Dict:
+    """OpenAI structured-output response_format for a prompt with a schema."""
+    return {"type": "json_schema",
+            "json_schema": {"name": prompt_def["name"], "schema": prompt_def["schema"], "strict": True}}
+
+
+def _validate_fused(data) -> Dict:
+    """Return only the fields of a fused response that are present and well-formed."""
+    if not isinstance(data, dict):
+        return {}
+    valid = {}
+    if isinstance(data.get("summary"), str) and data["summary"].strip():
+        valid["summary"] = data["summary"]
+    skills = data.get("skills")
+    if isinstance(skills, dict) and isinstance(skills.get("skills"), list):
+        valid["skills"] = Skills.from_dict(skills)
+    if isinstance(data.get("strengths"), str) and data["strengths"].strip():
+        valid["strengths"] = data["strengths"]
+    match = Match.from_dict(data)
+    if match.match_pct is not None and 0 <= match.match_pct <= 100:
+        valid["match_chain"] = match
+    return valid
+
+
+GOOGLE_MODELS = ["gemini-2.5-flash", "gemini-2.5-pro", "gemini-2.0-flash"]  # tried in order
+# GEMINI_API_BASE points the client at another endpoint, e.g. tools/fake_llm_server.py
+GOOGLE_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+GOOGLE_API_URL = GOOGLE_API_BASE + "/models/{model}:generateContent"
+GOOGLE_STREAM_URL = GOOGLE_API_BASE + "/models/{model}:streamGenerateContent"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 2  # per model, on 429/5xx
+BACKOFF_BASE = 0.5  # seconds; doubled on every retry, plus jitter
+
+
+class _CircuitBreaker:
+    """Skip a model endpoint for `cooldown` seconds after `threshold` consecutive failures."""
+
+    def __init__(self, threshold: int = 2, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, name: str) -> bool:
+        with self._lock:
+            return self._open_until.get(name, 0.0) > time.monotonic()
+
+    def record_success(self, name: str) -> None:
+        with self._lock:
+            self._failures.pop(name, None)
+            self._open_until.pop(name, None)
+
+    def record_failure(self, name: str) -> None:
+        with self._lock:
+            self._failures[name] = self._failures.get(name, 0) + 1
+            if self._failures[name] >= self.threshold:
+                self._open_until[name] = time.monotonic() + self.cooldown
+                self._failures[name] = 0
+
+
+_breaker = _CircuitBreaker()
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Module-level keep-alive session, so repeat calls reuse the TCP+TLS connection."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=len(GOOGLE_MODELS), pool_maxsize=16))
+            _session.headers.update({"Content-Type": "application/json"})
+        return _session
+
+
+def _backoff_delay(attempt: int) -> float:
+    return BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE)
+
+
+def _retry_delay(response, attempt: int) -> float:
+    """Wait before retrying a 429/5xx: the provider's Retry-After if given, else backoff."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return _backoff_delay(attempt)
+
+
+def _wait_for_retry(limiter, response, attempt: int) -> None:
+    delay = _retry_delay(response, attempt)
+    if response.status_code == 429:
+        # quota exhausted: hold every queued call for this model, not just this one
+        limiter.pause(delay)
+    else:
+        time.sleep(delay)
+
+
+def _is_endpoint_failure(error) -> bool:
+    """Whether a requests error says the endpoint is unhealthy (connection trouble, 429
+    or 5xx) rather than that the request itself was rejected (other 4xx)."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code in RETRY_STATUS or response.status_code >= 500
+
+
+# Token tally of the analyze_all call currently running (propagated into its worker threads)
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("current_usage", default=None)
+
+# Inputs that carry whole documents and are trimmed to the context budget
+_BUDGETED_INPUTS = ("context", "job_description")
+
+
 # Google API helper (using REST API instead of SDK)
-def _call_google_api(prompt_text: str, api_key: str = None) -> str:
-    """Call Google Generative API (Gemini) via REST."""
+def _call_google_api(prompt_text: str, api_key: str = None, schema: Dict = None) -> str:
+    """Call Google Generative API (Gemini) via REST; with a JSON `schema` the model is
+    asked for JSON output matching it."""
     import requests
     if api_key is None:
         api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY not set")
-    
-    # Use latest stable models (gemini-pro is deprecated)
-    models_to_try = [
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}",
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent?key={api_key}",
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}",
-    ]
-    headers = {"Content-Type": "application/json"}
+
+    # Models whose circuit is open are skipped; if every circuit is open, try them all anyway
+    models_to_try = [m for m in GOOGLE_MODELS if not _breaker.is_open(m)] or list(GOOGLE_MODELS)
+    session = _get_session()
     payload = {
         "contents": [
             {
@@ -63,32 +300,111 @@ def _call_google_api(prompt_text: str, api_key: str = None) -> str:
             }
         ]
     }
-    
+    if schema is not None:
+        payload["generationConfig"] = _generation_config(schema)
+
+    reserve = count_tokens(prompt_text, "google") + OUTPUT_TOKEN_ESTIMATE
     last_error = None
-    for url in models_to_try:
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=60)
-            response.raise_for_status()
+    for model in models_to_try:
+        url = GOOGLE_API_URL.format(model=model)
+        limiter = get_scheduler().limiter("google", model)
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire(reserve)
+            try:
+                response = session.post(url, params={"key": api_key}, json=payload, timeout=60)
+                if response.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} from {model}", response=response)
+                    _wait_for_retry(limiter, response, attempt)
+                    continue
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if not _is_endpoint_failure(e):
+                    raise  # bad request or credentials: another endpoint would refuse it too
+                last_error = e
+                break
             result = response.json()
             if "candidates" in result and len(result["candidates"]) > 0:
                 candidate = result["candidates"][0]
                 if "content" in candidate and "parts" in candidate["content"]:
                     parts = candidate["content"]["parts"]
                     if len(parts) > 0 and "text" in parts[0]:
+                        _breaker.record_success(model)
+                        limiter.settle(count_tokens(parts[0]["text"], "google") - OUTPUT_TOKEN_ESTIMATE)
                         return parts[0]["text"]
             raise ValueError(f"Unexpected response structure: {result}")
-        except requests.exceptions.RequestException as e:
-            last_error = e
-            continue
-    
+        _breaker.record_failure(model)
+
+    raise ValueError(f"Google API call failed (all endpoints tried): {last_error}")
+
+
+def _stream_google_api(prompt_text: str, api_key: str = None) -> Iterator[str]:
+    """Stream text pieces from Gemini's streamGenerateContent (server-sent events).
+
+    Endpoint failover only happens before the first piece arrives; after that an error
+    is raised, since the caller has already shown partial output.
+    """
+    import requests
+    if api_key is None:
+        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY not set")
+
+    models_to_try = [m for m in GOOGLE_MODELS if not _breaker.is_open(m)] or list(GOOGLE_MODELS)
+    session = _get_session()
+    payload = {"contents": [{"parts": [{"text": prompt_text}]}]}
+
+    reserve = count_tokens(prompt_text, "google") + OUTPUT_TOKEN_ESTIMATE
+    last_error = None
+    for model in models_to_try:
+        url = GOOGLE_STREAM_URL.format(model=model)
+        limiter = get_scheduler().limiter("google", model)
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire(reserve)
+            try:
+                response = session.post(url, params={"key": api_key, "alt": "sse"}, json=payload, timeout=60, stream=True)
+                if response.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                    response.close()
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} from {model}", response=response)
+                    _wait_for_retry(limiter, response, attempt)
+                    continue
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if not _is_endpoint_failure(e):
+                    raise  # bad request or credentials: another endpoint would refuse it too
+                last_error = e
+                break
+            streamed = 0
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[len("data:"):])
+                    for candidate in chunk.get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                streamed += count_tokens(part["text"], "google")
+                                yield part["text"]
+            _breaker.record_success(model)
+            limiter.settle(streamed - OUTPUT_TOKEN_ESTIMATE)
+            return
+        _breaker.record_failure(model)
+
     raise ValueError(f"Google API call failed (all endpoints tried): {last_error}")
 
 
 class Analyzer:
-    def __init__(self, model_name: str = MODEL_NAME, temperature: float = 0.0, provider: str = "openai"):
+    def __init__(self, model_name: str = MODEL_NAME, temperature: float = 0.0, provider: str = "openai", fused: bool = False,
+                 cache=None, max_context_tokens: int = None):
         self.provider = provider
+        self.fused = fused
+        # cache=None caches deterministic (temperature 0) calls in the shared cache;
+        # pass False to disable or a ResponseCache to use a specific one
+        if cache is None:
+            cache = get_default_cache() if temperature == 0 else False
+        self.cache = cache or None
         self.model_name = model_name
         self.temperature = temperature
+        self.max_context_tokens = max_context_tokens or context_budget(provider, model_name)
 
         if provider == "google":
             # Google provider — check API key is available
@@ -102,6 +418,7 @@ class Analyzer:
             self.summary_chain = None
             self.strengths_chain = None
             self.match_chain = None
+            self.fused_chain = None
         else:
             # OpenAI provider (default)
             from langchain_openai import ChatOpenAI
@@ -135,51 +452,306 @@ class Analyzer:
 
             self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
 
+            def structured_llm(prompt_def):
+                # structured outputs: the reply is constrained to the prompt's JSON schema
+                return ChatOpenAI(model_name=model_name, temperature=temperature,
+                                  model_kwargs={"response_format": _response_format(prompt_def)})
+
             # build PromptTemplate objects
             skills_prompt = PromptTemplate(input_variables=_SKILLS_PROMPT["input_variables"], template=_SKILLS_PROMPT["template"])
             summary_prompt = PromptTemplate(input_variables=_SUMMARY_PROMPT["input_variables"], template=_SUMMARY_PROMPT["template"])
             strengths_prompt = PromptTemplate(input_variables=_STRENGTHS_PROMPT["input_variables"], template=_STRENGTHS_PROMPT["template"])
             match_prompt = PromptTemplate(input_variables=_MATCH_PROMPT["input_variables"], template=_MATCH_PROMPT["template"])
+            fused_prompt = PromptTemplate(input_variables=_FUSED_PROMPT["input_variables"], template=_FUSED_PROMPT["template"])
 
             # create chains
-            self.skills_chain = LLMChain(llm=self.llm, prompt=skills_prompt)
+            self.skills_chain = LLMChain(llm=structured_llm(_SKILLS_PROMPT), prompt=skills_prompt)
             self.summary_chain = LLMChain(llm=self.llm, prompt=summary_prompt)
             self.strengths_chain = LLMChain(llm=self.llm, prompt=strengths_prompt)
-            self.match_chain = LLMChain(llm=self.llm, prompt=match_prompt)
+            self.match_chain = LLMChain(llm=structured_llm(_MATCH_PROMPT), prompt=match_prompt)
+            self.fused_chain = LLMChain(llm=structured_llm(_FUSED_PROMPT), prompt=fused_prompt)
 
-    def extract_skills_and_experience(self, context: str) -> Dict:
+    def _prepare(self, prompt_def: Dict, inputs: Dict):
+        """Trim document inputs to the context budget and render the prompt.
+
+        Returns (prompt, cache_key, trimmed); cache_key is None when caching is off.
+        """
+        trimmed = False
+        for name in _BUDGETED_INPUTS:
+            if name in inputs:
+                inputs[name], _, was_trimmed = fit_context(inputs[name], self.max_context_tokens,
+                                                           self.provider, self.model_name)
+                trimmed = trimmed or was_trimmed
+        prompt = prompt_def["template"].format(**inputs)
+        key = None
+        if self.cache is not None:
+            model = self.model_name if self.provider != "google" else ",".join(GOOGLE_MODELS)
+            key = make_key(self.provider, model, prompt_def["template"], inputs, self.temperature)
+        return prompt, key, trimmed
+
+    def _record(self, prompt: str, out: str, key, trimmed: bool) -> Dict:
+        """Store a fresh response in the cache and add it to the current token tally.
+        Returns the call's token counts."""
+        if key is not None:
+            self.cache.set(key, out)
+        tokens = {"prompt_tokens": count_tokens(prompt, self.provider, self.model_name),
+                  "completion_tokens": count_tokens(out, self.provider, self.model_name)}
+        tracing.LLM_TOKENS.inc("prompt", tokens["prompt_tokens"])
+        tracing.LLM_TOKENS.inc("completion", tokens["completion_tokens"])
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.add(tokens["prompt_tokens"], tokens["completion_tokens"], trimmed=trimmed)
+        return tokens
+
+    def _acquire(self, prompt: str):
+        """Wait for OpenAI quota for one call; Gemini calls are throttled per endpoint instead."""
+        limiter = get_scheduler().limiter(self.provider, self.model_name)
+        limiter.acquire(count_tokens(prompt, self.provider, self.model_name) + OUTPUT_TOKEN_ESTIMATE)
+        return limiter
+
+    def _cached(self, key, trimmed: bool):
+        if key is None:
+            tracing.LLM_CALLS.inc("off")
+            return None
+        cached = self.cache.get(key)
+        tracing.LLM_CALLS.inc("hit" if cached is not None else "miss")
+        usage = _current_usage.get()
+        if cached is not None and usage is not None:
+            usage.add(0, 0, cached=True, trimmed=trimmed)
+        return cached
+
+    def _complete(self, prompt_def: Dict, chain, refresh: bool = False, **inputs) -> str:
+        """Render and run one prompt, going through the response cache when enabled
+        (`refresh` skips the cache lookup and overwrites the entry).
+
+        Document inputs are trimmed to `max_context_tokens` first, and token usage is
+        added to the tally of the surrounding analyze_all call, if any.
+        """
+        with tracing.span("llm." + prompt_def["name"], provider=self.provider) as span:
+            prompt, key, trimmed = self._prepare(prompt_def, inputs)
+            cached = None if refresh else self._cached(key, trimmed)
+            span.set(cached=cached is not None)
+            if cached is not None:
+                return cached
+            if self.provider == "google":
+                out = _call_google_api(prompt, self.google_api_key, prompt_def.get("schema"))
+            else:
+                limiter = self._acquire(prompt)
+                out = chain.run(**inputs)
+                limiter.settle(count_tokens(out, self.provider, self.model_name) - OUTPUT_TOKEN_ESTIMATE)
+            span.set(**self._record(prompt, out, key, trimmed))
+            return out
+
+    def _stream(self, prompt_def: Dict, **inputs) -> Iterator[str]:
+        """Like _complete, but yields the response in pieces as the provider generates it.
+        A cache hit is yielded as a single piece."""
+        # timed by hand: a span() here would stay open across the generator's yields
+        start = time.perf_counter()
+        name = "llm." + prompt_def["name"]
+        prompt, key, trimmed = self._prepare(prompt_def, inputs)
+        cached = self._cached(key, trimmed)
+        if cached is not None:
+            tracing.record(name, time.perf_counter() - start, provider=self.provider, cached=True)
+            yield cached
+            return
+        limiter = None
         if self.provider == "google":
-            prompt = _SKILLS_PROMPT["template"].format(context=context)
-            out = _call_google_api(prompt, self.google_api_key)
+            pieces = _stream_google_api(prompt, self.google_api_key)
         else:
-            out = self.skills_chain.run(context=context)
-        try:
-            parsed = json.loads(out)
-            return parsed
-        except Exception:
-            return {"raw": out}
+            limiter = self._acquire(prompt)
+            pieces = (chunk.content for chunk in self.llm.stream(prompt))
+        out = []
+        for piece in pieces:
+            out.append(piece)
+            yield piece
+        out = "".join(out)
+        if limiter is not None:
+            limiter.settle(count_tokens(out, self.provider, self.model_name) - OUTPUT_TOKEN_ESTIMATE)
+        tokens = self._record(prompt, out, key, trimmed)
+        tracing.record(name, time.perf_counter() - start, provider=self.provider, cached=False, **tokens)
+
+    def _complete_json(self, prompt_def: Dict, chain, **inputs):
+        """Run a structured prompt and return (parsed JSON or None, raw output).
+
+        The call is repeated (up to JSON_RETRIES times, bypassing the cache) only when the
+        output holds no JSON or does not match the prompt's schema; if it never does, the
+        last parseable value is returned as is, together with the output it came from.
+        """
+        result = (None, None)
+        for attempt in range(JSON_RETRIES + 1):
+            out = self._complete(prompt_def, chain, refresh=attempt > 0, **inputs)
+            try:
+                data = _parse_json(out)
+            except ValueError:
+                if result[0] is None:
+                    result = (None, out)
+                continue
+            result = (data, out)
+            if _matches_schema(data, prompt_def["schema"]):
+                break
+            tracing.LLM_CALLS.inc("schema_retry")
+        return result
+
+    def extract_skills_and_experience(self, context: str) -> Skills:
+        data, out = self._complete_json(_SKILLS_PROMPT, self.skills_chain, context=context)
+        return Skills.from_dict(data) if isinstance(data, dict) else Skills(raw=out)
 
     def summarize(self, context: str) -> str:
-        if self.provider == "google":
-            prompt = _SUMMARY_PROMPT["template"].format(context=context)
-            return _call_google_api(prompt, self.google_api_key)
-        else:
-            return self.summary_chain.run(context=context)
+        return self._complete(_SUMMARY_PROMPT, self.summary_chain, context=context)
+
+    def summarize_stream(self, context: str) -> Iterator[str]:
+        return self._stream(_SUMMARY_PROMPT, context=context)
 
     def strengths_and_suggestions(self, context: str) -> str:
-        if self.provider == "google":
-            prompt = _STRENGTHS_PROMPT["template"].format(context=context)
-            return _call_google_api(prompt, self.google_api_key)
-        else:
-            return self.strengths_chain.run(context=context)
+        return self._complete(_STRENGTHS_PROMPT, self.strengths_chain, context=context)
 
-    def match_with_job(self, resume_summary: str, job_description: str) -> Dict:
-        if self.provider == "google":
-            prompt = _MATCH_PROMPT["template"].format(resume_summary=resume_summary, job_description=job_description)
-            out = _call_google_api(prompt, self.google_api_key)
-        else:
-            out = self.match_chain.run(resume_summary=resume_summary, job_description=job_description)
+    def strengths_and_suggestions_stream(self, context: str) -> Iterator[str]:
+        return self._stream(_STRENGTHS_PROMPT, context=context)
+
+    def match_with_job(self, resume_summary: str, job_description: str) -> Match:
+        data, out = self._complete_json(_MATCH_PROMPT, self.match_chain, resume_summary=resume_summary,
+                                        job_description=job_description)
+        return Match.from_dict(data) if isinstance(data, dict) else Match(raw=out)
+
+    def analyze_fused(self, context: str, job_description: str) -> Dict:
+        """Run the whole analysis as one consolidated request.
+
+        Fields missing or malformed in the fused response are filled in with the
+        regular per-field calls, so the result always has the same keys as analyze_all.
+        """
+        out = self._complete(_FUSED_PROMPT, self.fused_chain, context=context, job_description=job_description)
         try:
-            return json.loads(out)
+            result = _validate_fused(_parse_json(out))
         except Exception:
-            return {"raw": out}
+            result = {}
+
+        if "summary" not in result:
+            result["summary"] = self.summarize(context)
+        if "skills" not in result:
+            result["skills"] = self.extract_skills_and_experience(context)
+        if "strengths" not in result:
+            result["strengths"] = self.strengths_and_suggestions(context)
+        if "match_chain" not in result:
+            result["match_chain"] = self.match_with_job(result["summary"], job_description)
+        return result
+
+    def analyze_all(self, context: str, job_description: str, max_workers: int = 3,
+                    on_event: Callable[[Dict], None] = None, priority_level: int = None) -> Dict:
+        """Run all analysis calls concurrently (or as one request when `fused` is set).
+
+        summarize, extract_skills_and_experience and strengths_and_suggestions only
+        depend on `context`, so they are dispatched together; match_with_job is
+        chained onto the summary as soon as it is ready. Returns a dict with `summary`,
+        `skills` (Skills), `strengths`, `match_chain` (Match) and the request's `token_usage`.
+
+        With `on_event`, the summary and strengths are streamed: on_event receives
+        {"event": "summary_token" | "strengths_token", "data": text} for each piece and
+        {"event": <section>, "data": value} as each section completes (called from
+        worker threads).
+
+        `priority_level` (chains.rate_limit.INTERACTIVE or BATCH) orders this analysis's
+        calls in the provider rate limiter's queue; by default the caller's level is kept.
+        """
+        usage = TokenUsage()
+        token = _current_usage.set(usage)
+        level = priority(priority_level) if priority_level is not None else contextlib.nullcontext()
+        try:
+            with level:
+                result = self._analyze(context, job_description, max_workers, on_event)
+        finally:
+            _current_usage.reset(token)
+        result["token_usage"] = usage.as_dict()
+        return result
+
+    def analyze_for_jobs(self, context: str, job_descriptions: List[str], max_workers: int = 3,
+                         priority_level: int = None) -> List[Dict]:
+        """analyze_all for one resume against several job descriptions.
+
+        summary, skills and strengths only depend on `context`, so they are requested
+        once and shared by every result; only match_with_job runs per JD. Each result's
+        `token_usage` covers its own match call, and the first one also the shared
+        calls. In fused mode each JD is still a separate fused request.
+        """
+        if self.fused or len(job_descriptions) < 2:
+            return [self.analyze_all(context, jd, max_workers, priority_level=priority_level)
+                    for jd in job_descriptions]
+
+        def submit(fn, *args):
+            return pool.submit(contextvars.copy_context().run, fn, *args)
+
+        usages = [TokenUsage() for _ in job_descriptions]
+        token = _current_usage.set(usages[0])
+        level = priority(priority_level) if priority_level is not None else contextlib.nullcontext()
+        try:
+            with level, ThreadPoolExecutor(max_workers=max_workers) as pool:
+                summary_f = submit(self.summarize, context)
+                skills_f = submit(self.extract_skills_and_experience, context)
+                strengths_f = submit(self.strengths_and_suggestions, context)
+                summary = summary_f.result()
+                match_fs = []
+                for jd, usage in zip(job_descriptions, usages):
+                    _current_usage.set(usage)
+                    match_fs.append(submit(self.match_with_job, summary, jd))
+                skills, strengths = skills_f.result(), strengths_f.result()
+                matches = [f.result() for f in match_fs]
+        finally:
+            _current_usage.reset(token)
+        return [{"summary": summary, "skills": skills, "strengths": strengths, "match_chain": match,
+                 "token_usage": usage.as_dict()} for match, usage in zip(matches, usages)]
+
+    def analyze_batch(self, items: Dict[str, tuple], client=None, poll_interval: float = None,
+                      timeout: float = None) -> Dict[str, Dict]:
+        """Analyze many id -> (context, job_description) pairs through the provider's
+        batch API (cheaper, but may take hours); see chains.batch_api."""
+        from chains import batch_api
+        interval = batch_api.POLL_INTERVAL if poll_interval is None else poll_interval
+        return batch_api.analyze_batch(self, items, client=client, poll_interval=interval, timeout=timeout)
+
+    def _analyze(self, context: str, job_description: str, max_workers: int,
+                 on_event: Callable[[Dict], None] = None) -> Dict:
+        if not self.fused:
+            return self._analyze_concurrently(context, job_description, max_workers, on_event)
+        result = self.analyze_fused(context, job_description)
+        if on_event is not None:
+            for section in ("summary", "skills", "strengths", "match_chain"):
+                on_event({"event": section, "data": result[section]})
+        return result
+
+    def _analyze_concurrently(self, context: str, job_description: str, max_workers: int,
+                              on_event: Callable[[Dict], None] = None) -> Dict:
+        def submit(section, fn, *args):
+            # each task runs in its own copy of the context so it sees the current tally
+            return pool.submit(contextvars.copy_context().run, run, section, fn, *args)
+
+        def run(section, fn, *args):
+            value = fn(*args)
+            if on_event is not None:
+                on_event({"event": section, "data": value})
+            return value
+
+        def streamed(section, stream_fn):
+            def call(*args):
+                pieces = []
+                for piece in stream_fn(*args):
+                    pieces.append(piece)
+                    on_event({"event": section + "_token", "data": piece})
+                return "".join(pieces)
+            return call
+
+        summarize, strengths = self.summarize, self.strengths_and_suggestions
+        if on_event is not None:
+            summarize = streamed("summary", self.summarize_stream)
+            strengths = streamed("strengths", self.strengths_and_suggestions_stream)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            summary_f = submit("summary", summarize, context)
+            skills_f = submit("skills", self.extract_skills_and_experience, context)
+            strengths_f = submit("strengths", strengths, context)
+            summary = summary_f.result()
+            match_f = submit("match_chain", self.match_with_job, summary, job_description)
+            return {
+                "summary": summary,
+                "skills": skills_f.result(),
+                "strengths": strengths_f.result(),
+                "match_chain": match_f.result(),
+            }
@@ -0,0 +1,227 @@
+# chains/batch_api.py
+"""Offline bulk analysis through the providers' asynchronous batch endpoints.
+
+Batch jobs are cheaper than regular calls but may take hours, so they suit overnight
+screening. The rendered prompts of many analyses are written into one job, submitted,
+polled until finished, and the responses are stored in the analyzer's response cache
+under the same keys regular calls use. The final results are then assembled with
+analyze_all, which is served from the cache; prompts that failed in the batch are
+retried as regular calls.
+
+Non-fused analyses need two jobs: summary/skills/strengths first, then the match
+prompt, which takes the summary as input.
+"""
+import copy
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from chains.analysis_chain import GOOGLE_API_BASE, _generation_config, _response_format
+from chains.cache import ResponseCache
+
+OPENAI_API_BASE = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+POLL_INTERVAL = 30.0  # seconds between status checks
+
+_OPENAI_DONE = {"completed", "failed", "expired", "cancelled"}
+_GOOGLE_DONE = {"BATCH_STATE_SUCCEEDED", "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED"}
+
+
+class BatchJobError(RuntimeError):
+    pass
+
+
+class OpenAIBatchClient:
+    """OpenAI Batch API: upload a JSONL file of chat completions, create a batch, download the output file."""
+
+    def __init__(self, model: str, temperature: float = 0.0, api_key: str = None, base_url: str = OPENAI_API_BASE):
+        import requests
+        self.model = model
+        self.temperature = temperature
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key or os.getenv('OPENAI_API_KEY', '')}"
+
+    def submit(self, prompts: Dict[str, str], prompt_defs: Dict[str, Dict] = None) -> str:
+        """Start a job; `prompt_defs` maps custom ids to prompt definitions whose schema
+        constrains the reply, as in regular calls."""
+        prompt_defs = prompt_defs or {}
+        lines = []
+        for custom_id, prompt in prompts.items():
+            body = {"model": self.model, "temperature": self.temperature,
+                    "messages": [{"role": "user", "content": prompt}]}
+            prompt_def = prompt_defs.get(custom_id)
+            if prompt_def is not None and "schema" in prompt_def:
+                body["response_format"] = _response_format(prompt_def)
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions",
+                                     "body": body}))
+        upload = self.session.post(f"{self.base_url}/files", data={"purpose": "batch"},
+                                   files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"))}, timeout=300)
+        upload.raise_for_status()
+        batch = self.session.post(f"{self.base_url}/batches", timeout=60, json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        })
+        batch.raise_for_status()
+        return batch.json()["id"]
+
+    def poll(self, job_id: str) -> Optional[dict]:
+        """The finished batch object, or None while it is still running."""
+        response = self.session.get(f"{self.base_url}/batches/{job_id}", timeout=60)
+        response.raise_for_status()
+        batch = response.json()
+        return batch if batch["status"] in _OPENAI_DONE else None
+
+    def results(self, job: dict) -> Dict[str, str]:
+        if job["status"] != "completed" or not job.get("output_file_id"):
+            raise BatchJobError(f"batch {job['id']} ended with status {job['status']}")
+        response = self.session.get(f"{self.base_url}/files/{job['output_file_id']}/content", timeout=300)
+        response.raise_for_status()
+        out = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            body = (row.get("response") or {}).get("body") or {}
+            if row.get("error") or (row.get("response") or {}).get("status_code") != 200:
+                continue  # failed request: retried as a regular call
+            out[row["custom_id"]] = body["choices"][0]["message"]["content"]
+        return out
+
+
+class GoogleBatchClient:
+    """Gemini Batch Mode with inline requests (batchGenerateContent)."""
+
+    def __init__(self, model: str, api_key: str = None, base_url: str = GOOGLE_API_BASE):
+        import requests
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.params = {"key": api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or ""}
+
+    def submit(self, prompts: Dict[str, str], prompt_defs: Dict[str, Dict] = None) -> str:
+        prompt_defs = prompt_defs or {}
+        requests_ = []
+        for custom_id, prompt in prompts.items():
+            request = {"contents": [{"parts": [{"text": prompt}]}]}
+            prompt_def = prompt_defs.get(custom_id)
+            if prompt_def is not None and "schema" in prompt_def:
+                request["generationConfig"] = _generation_config(prompt_def["schema"])
+            requests_.append({"request": request, "metadata": {"key": custom_id}})
+        response = self.session.post(f"{self.base_url}/models/{self.model}:batchGenerateContent", timeout=300, json={
+            "batch": {"display_name": "resume-analysis", "input_config": {"requests": {"requests": requests_}}},
+        })
+        response.raise_for_status()
+        return response.json()["name"]
+
+    def poll(self, job_id: str) -> Optional[dict]:
+        response = self.session.get(f"{self.base_url}/{job_id}", timeout=60)
+        response.raise_for_status()
+        operation = response.json()
+        state = operation.get("metadata", {}).get("state")
+        return operation if operation.get("done") or state in _GOOGLE_DONE else None
+
+    def results(self, job: dict) -> Dict[str, str]:
+        state = job.get("metadata", {}).get("state")
+        if "error" in job or state != "BATCH_STATE_SUCCEEDED":
+            raise BatchJobError(f"batch {job.get('name')} ended with state {state}: {job.get('error')}")
+        inlined = job.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        out = {}
+        for item in inlined:
+            parts = (((item.get("response") or {}).get("candidates") or [{}])[0].get("content") or {}).get("parts") or []
+            if "error" in item or not parts or "text" not in parts[0]:
+                continue
+            out[item["metadata"]["key"]] = parts[0]["text"]
+        return out
+
+
+def make_client(analyzer, **kwargs):
+    """Batch client for the analyzer's provider; kwargs go to the client (e.g. base_url)."""
+    from chains.analysis_chain import GOOGLE_MODELS
+    if analyzer.provider == "google":
+        return GoogleBatchClient(GOOGLE_MODELS[0], api_key=analyzer.google_api_key, **kwargs)
+    return OpenAIBatchClient(analyzer.model_name, analyzer.temperature, **kwargs)
+
+
+def run_job(client, prompts: Dict[str, str], poll_interval: float = POLL_INTERVAL,
+            timeout: float = None, prompt_defs: Dict[str, Dict] = None) -> Dict[str, str]:
+    """Submit `prompts` (custom_id -> prompt) as one job and wait for its responses.
+
+    `prompt_defs` (custom_id -> prompt definition) supplies response schemas."""
+    if not prompts:
+        return {}
+    job_id = client.submit(prompts, prompt_defs)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = client.poll(job_id)
+        if job is not None:
+            return client.results(job)
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"batch job {job_id} not finished after {timeout}s")
+        time.sleep(poll_interval)
+
+
+def _collect(analyzer, calls: List[Tuple[Dict, Dict]]) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+    """Render (prompt_def, inputs) calls that are not cached yet.
+
+    Returns (cache key -> prompt, cache key -> prompt_def)."""
+    prompts, prompt_defs = {}, {}
+    for prompt_def, inputs in calls:
+        prompt, key, _ = analyzer._prepare(prompt_def, dict(inputs))
+        if key not in prompts and analyzer.cache.get(key) is None:
+            prompts[key] = prompt
+            prompt_defs[key] = prompt_def
+    return prompts, prompt_defs
+
+
+def _run(analyzer, client, calls, poll_interval: float, timeout: float) -> None:
+    prompts, prompt_defs = _collect(analyzer, calls)
+    _store(analyzer, run_job(client, prompts, poll_interval, timeout, prompt_defs))
+
+
+def _store(analyzer, responses: Dict[str, str]) -> None:
+    for key, out in responses.items():
+        analyzer.cache.set(key, out)
+
+
+def analyze_batch(analyzer, items: Dict[str, Tuple[str, str]], client=None,
+                  poll_interval: float = POLL_INTERVAL, timeout: float = None) -> Dict[str, Dict]:
+    """Analyze many (context, job_description) pairs, keyed by caller-chosen ids, via batch jobs.
+
+    Returns id -> the same dict analyze_all would return, or {"error": message} for an
+    item whose analysis failed. Identical prompts (e.g. the summary of a resume screened
+    against several JDs) are only submitted once.
+    """
+    from chains.analysis_chain import _FUSED_PROMPT, _MATCH_PROMPT, _SKILLS_PROMPT, _STRENGTHS_PROMPT, _SUMMARY_PROMPT
+
+    if analyzer.cache is None:
+        # batch responses are handed to analyze_all through a cache; use a private one
+        analyzer = copy.copy(analyzer)
+        analyzer.cache = ResponseCache(path=None, max_entries=max(1024, 5 * len(items)))
+    client = client or make_client(analyzer)
+
+    if analyzer.fused:
+        calls = [(_FUSED_PROMPT, {"context": c, "job_description": jd}) for c, jd in items.values()]
+        _run(analyzer, client, calls, poll_interval, timeout)
+    else:
+        calls = [(prompt_def, {"context": c}) for c, _ in items.values()
+                 for prompt_def in (_SUMMARY_PROMPT, _SKILLS_PROMPT, _STRENGTHS_PROMPT)]
+        _run(analyzer, client, calls, poll_interval, timeout)
+        # the match prompt takes the summary, so it goes out in a second job
+        calls = []
+        for context, jd in items.values():
+            _, key, _ = analyzer._prepare(_SUMMARY_PROMPT, {"context": context})
+            summary = analyzer.cache.get(key)
+            if summary is not None:
+                calls.append((_MATCH_PROMPT, {"resume_summary": summary, "job_description": jd}))
+        _run(analyzer, client, calls, poll_interval, timeout)
+
+    results = {}
+    for item_id, (context, jd) in items.items():
+        # one failing item must not discard the rest of the job
+        try:
+            results[item_id] = analyzer.analyze_all(context, jd)
+        except Exception as e:
+            results[item_id] = {"error": f"{type(e).__name__}: {e}"}
+    return results
@@ -0,0 +1,148 @@
+# chains/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.sqlite")
+# LLM_CACHE=0 turns the shared cache off (e.g. for benchmarks that must reach the provider)
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no")
+# Stored responses expire after LLM_CACHE_TTL seconds (0 keeps them forever) and the
+# file keeps at most LLM_CACHE_MAX_ROWS responses, dropping the oldest first
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))) or None
+CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+PRUNE_EVERY = 256  # writes between prunes of the SQLite file
+
+
+def make_key(provider: str, model: str, template: str, inputs: Dict, temperature: float) -> str:
+    """Content-addressed cache key for one rendered LLM request."""
+    payload = json.dumps(
+        {"provider": provider, "model": model, "template": template, "inputs": inputs, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LLM response cache: in-memory LRU in front of an optional SQLite file.
+
+    Entries older than `ttl` seconds are treated as misses (ttl=None keeps them forever).
+    The file is pruned of expired entries, and down to `max_rows`, every PRUNE_EVERY
+    writes. It is opened in WAL mode with separate reader and writer connections, so
+    lookups never wait for a write to commit. Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_entries: int = 1024, ttl: Optional[float] = CACHE_TTL,
+                 max_rows: int = CACHE_MAX_ROWS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reader = self._writer = None
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writes = 0
+        if path:
+            self._writer = sqlite3.connect(path, check_same_thread=False)
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            self._writer.execute("PRAGMA synchronous=NORMAL")  # WAL commits without an fsync each
+            self._writer.executescript(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS responses_created ON responses (created);"
+            )
+            self._prune()
+            self._writer.commit()
+            self._reader = sqlite3.connect(path, check_same_thread=False)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._lru.get(key)
+        if entry is None and self._reader is not None:
+            with self._read_lock:
+                row = self._reader.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+        with self._lock:
+            if entry is None or self._expired(entry[1]):
+                # expired rows are deleted from the file by the next prune
+                self._lru.pop(key, None)
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+        if self._writer is not None:
+            with self._write_lock:
+                self._writer.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)", (key, entry[0], entry[1])
+                )
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    self._prune()
+                self._writer.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._lru),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+        if self._writer is not None:
+            with self._write_lock:
+                self._writer.execute("DELETE FROM responses")
+                self._writer.commit()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _prune(self) -> None:
+        """Drop expired rows, then the oldest rows over max_rows (caller holds the write lock and commits)."""
+        if self.ttl is not None:
+            self._writer.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        excess = self._writer.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_rows
+        if excess > 0:
+            self._writer.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY created LIMIT ?)", (excess,)
+            )
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Process-wide cache shared by all Analyzer instances (None when LLM_CACHE=0)."""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
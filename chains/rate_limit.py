@@ -0,0 +1,188 @@
+# chains/rate_limit.py
+"""Client-side rate limiting for LLM providers.
+
+Every (provider, model) pair can get a request bucket (requests/min) and a token bucket
+(tokens/min). Callers queue for capacity in priority order, so interactive analyses go
+ahead of batch work, and a 429 pauses the whole queue for that model instead of letting
+every thread retry on its own.
+
+Buckets are off unless configured: LLM_RPM / LLM_TPM apply to every model, and
+LLM_RATE_LIMITS=free-tier applies the FREE_TIER_LIMITS table. The 429 pause always applies.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+INTERACTIVE = 0
+BATCH = 10
+
+BURST_SECONDS = 10.0  # buckets hold this many seconds of quota, so bursts are smoothed out
+# an analysis fans out this many calls at once; request buckets always hold at least that many
+ANALYSIS_FAN_OUT = 4
+OUTPUT_TOKEN_ESTIMATE = 500  # reserved per call for the response, settled once it arrives
+
+# (requests/min, tokens/min) per model on the providers' free tiers; opt-in, see above
+FREE_TIER_LIMITS: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    "gemini-2.5-flash": (10, 250_000),
+    "gemini-2.5-pro": (5, 250_000),
+    "gemini-2.0-flash": (15, 1_000_000),
+    "gpt-4o-mini": (500, 200_000),
+}
+
+# Priority of the LLM calls made in the current context (propagated into worker threads)
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("current_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Run the enclosed LLM calls at `level` (lower runs first)."""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_min`, holds at most `capacity`. Not thread-safe."""
+
+    def __init__(self, rate_per_min: float, capacity: float = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        # may go negative when a request is larger than the bucket or settled late
+        self.level -= amount
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits for one model, with a priority queue of waiters."""
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        self.requests = TokenBucket(rpm, max(ANALYSIS_FAN_OUT, rpm / 60.0 * BURST_SECONDS)) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _wait_time(self, tokens: float, now: float) -> float:
+        wait = self._paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def acquire(self, tokens: float = 0, level: int = None) -> float:
+        """Block until this call may go out; returns the seconds spent waiting."""
+        level = _current_priority.get() if level is None else level
+        start = time.monotonic()
+        with self._cond:
+            entry = (level, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now)
+                    if self._queue[0] == entry and wait <= 0:
+                        break
+                    # only the head of the queue sleeps on the buckets; others wait their turn
+                    self._cond.wait(wait if self._queue[0] == entry else None)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            waited = time.monotonic() - start
+            self.calls += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited > 0.001:
+                self.waited_calls += 1
+        return waited
+
+    def settle(self, extra_tokens: float) -> None:
+        """Correct the token reservation once the real usage of a call is known."""
+        if self.tokens is not None and extra_tokens:
+            with self._cond:
+                self.tokens.take(extra_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every queued call for `seconds`, e.g. after the provider answered 429."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "total_wait_s": round(self.total_wait, 3),
+                "max_wait_s": round(self.max_wait, 3),
+                "avg_wait_s": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+            }
+
+
+class Scheduler:
+    """One RateLimiter per (provider, model), created on first use."""
+
+    def __init__(self, limits: Dict[str, Tuple[Optional[float], Optional[float]]] = None):
+        if limits is None:
+            limits = FREE_TIER_LIMITS if os.getenv("LLM_RATE_LIMITS", "").lower() == "free-tier" else {}
+        self.limits = dict(limits)
+        self._limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str, model: str) -> RateLimiter:
+        key = (provider, model)
+        with self._lock:
+            if key not in self._limiters:
+                rpm, tpm = self.limits.get(model, (None, None))
+                rpm = float(os.getenv("LLM_RPM", 0)) or rpm
+                tpm = float(os.getenv("LLM_TPM", 0)) or tpm
+                self._limiters[key] = RateLimiter(rpm, tpm)
+            return self._limiters[key]
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {f"{provider}/{model}": lim.stats() for (provider, model), lim in limiters.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Process-wide scheduler shared by every Analyzer."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
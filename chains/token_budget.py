@@ -0,0 +1,114 @@
+# chains/token_budget.py
+"""Token estimates and context budgets for LLM prompts.
+
+Oversized resumes are trimmed section by section (skills and experience are kept first)
+before they reach the provider, so long uploads don't blow up latency and cost.
+"""
+import os
+import threading
+from typing import Dict, Tuple
+
+from extractor.text_utils import estimate_tokens, section_spans
+
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "6000"))
+# Per provider/model overrides of the context budget (tokens of resume text per prompt)
+CONTEXT_BUDGETS: Dict[Tuple[str, str], int] = {}
+
+# Lower rank is kept first when a resume must be trimmed
+_SECTION_RANKS = [
+    ("skill", 0), ("experience", 1), ("employment", 1), ("summary", 2), ("profile", 2),
+    ("objective", 2), ("header", 3), ("project", 4), ("education", 5), ("certification", 6),
+]
+
+_encodings = {}
+
+
+def count_tokens(text: str, provider: str = "openai", model: str = None) -> int:
+    """Exact count with tiktoken for OpenAI models when installed, otherwise an estimate."""
+    if provider == "openai":
+        try:
+            import tiktoken
+        except ImportError:
+            return estimate_tokens(text)
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("cl100k_base")
+        return len(_encodings[model].encode(text))
+    return estimate_tokens(text)
+
+
+def context_budget(provider: str, model: str = None) -> int:
+    return CONTEXT_BUDGETS.get((provider, model), DEFAULT_CONTEXT_TOKENS)
+
+
+def _rank(section_name: str) -> int:
+    for needle, rank in _SECTION_RANKS:
+        if needle in section_name:
+            return rank
+    return len(_SECTION_RANKS)
+
+
+def fit_context(text: str, budget: int, provider: str = "openai", model: str = None) -> Tuple[str, int, bool]:
+    """Trim `text` to about `budget` tokens. Returns (text, tokens, trimmed).
+
+    Whole sections are kept in priority order; the first section that doesn't fit is cut
+    to the remaining budget. Kept sections stay in their original order.
+    """
+    tokens = count_tokens(text, provider, model)
+    if tokens <= budget:
+        return text, tokens, False
+
+    sections = section_spans(text)
+    order = sorted(range(len(sections)), key=lambda i: _rank(sections[i][0]))
+    kept = {}
+    remaining = budget
+    for i in order:
+        _, start, end = sections[i]
+        piece = text[start:end].strip()
+        cost = count_tokens(piece, provider, model)
+        if cost <= remaining:
+            kept[i] = piece
+            remaining -= cost
+        elif remaining > 0:
+            # cut proportionally, leaving a little slack for estimate error
+            kept[i] = piece[:int(len(piece) * remaining / cost * 0.95)]
+            remaining = 0
+        if remaining <= 0:
+            break
+    trimmed = "\n\n".join(kept[i] for i in sorted(kept) if kept[i])
+    return trimmed, count_tokens(trimmed, provider, model), True
+
+
+class TokenUsage:
+    """Thread-safe per-request tally of prompt/completion tokens."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.cached_calls = 0
+        self.trimmed = False
+        self._lock = threading.Lock()
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cached: bool = False, trimmed: bool = False) -> None:
+        with self._lock:
+            if cached:
+                self.cached_calls += 1
+            else:
+                self.calls += 1
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+            self.trimmed = self.trimmed or trimmed
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "calls": self.calls,
+                "cached_calls": self.cached_calls,
+                "context_trimmed": self.trimmed,
+            }
@@ -0,0 +1,257 @@
+# embeddings/candidate_index.py
+"""Persistent pool of resumes that can be searched by job description.
+
+    index = CandidateIndex("candidates/", vectorizer)      # fitted TF-IDF model, stored with the index
+    index.add("r-17", chunks, {"name": "Ada", "file": "ada.pdf"})
+    index.search(job_description, k=50)                      # ranked resumes, best chunk first
+
+Chunk vectors are L2-normalized float32 rows appended to a flat file that is read through
+a memory map, so search cost is one pass of dot products over the file and the resident
+set stays small at hundreds of thousands of resumes. Resume ids, metadata and the row
+count live in SQLite. Rows of a resume are contiguous; deleting or replacing a resume
+only marks it dead, and its rows are dropped by compact() (run automatically once more
+than COMPACT_RATIO of the rows are dead). One process should write to an index at a time.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.tracing import span
+
+VECTORS_FILE = "vectors.f32"
+OWNERS_FILE = "owners.i64"
+DB_FILE = "index.sqlite"
+VECTORIZER_FILE = "vectorizer.joblib"
+COMPACT_RATIO = 0.3
+SEARCH_BLOCK_ROWS = 65536  # rows scored per step, bounds the temporary arrays of a search
+
+
+class CandidateIndex:
+    """Resume chunk vectors keyed by resume id, searchable by job description."""
+
+    def __init__(self, path: str, vectorizer=None):
+        import numpy as np
+        from embeddings.tfidf import get_shared_vectorizer, load_embedding_model
+
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        model_path = os.path.join(path, VECTORIZER_FILE)
+        if os.path.exists(model_path):
+            # the stored model defines the vector space; a different one would make old rows meaningless
+            self.vectorizer = load_embedding_model(model_path)
+        else:
+            self.vectorizer = vectorizer if vectorizer is not None else get_shared_vectorizer()
+            if self.vectorizer is None:
+                raise ValueError("a new candidate index needs a fitted vectorizer (see tools/fit_embeddings.py)")
+            import joblib
+            joblib.dump(self.vectorizer, model_path)
+        self.dim = len(self.vectorizer.vocabulary_)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, DB_FILE), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS resumes (ord INTEGER PRIMARY KEY, id TEXT NOT NULL, metadata TEXT,"
+            " rows INTEGER NOT NULL, alive INTEGER NOT NULL DEFAULT 1);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS resumes_alive_id ON resumes (id) WHERE alive = 1;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+        )
+        self._db.commit()
+        self._rows = self._meta("rows")
+        self._dead_rows = self._meta("dead_rows")
+        # rows appended after the last committed add (e.g. a crash mid-write) are discarded
+        for name, itemsize in ((VECTORS_FILE, 4 * self.dim), (OWNERS_FILE, 8)):
+            file_path = os.path.join(path, name)
+            with open(file_path, "ab") as f:
+                if f.tell() != self._rows * itemsize:
+                    f.truncate(self._rows * itemsize)
+        self._np = np
+        self._mapped = None  # (vectors, owners, group starts, group ordinals), rebuilt after writes
+        self._alive = None   # ordinal -> alive flag, rebuilt after writes
+
+    def _meta(self, key: str) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, **values) -> None:
+        self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items())
+
+    def __len__(self) -> int:
+        """Number of live resumes."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM resumes WHERE alive = 1").fetchone()[0]
+
+    def __contains__(self, resume_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM resumes WHERE id = ? AND alive = 1", (resume_id,)).fetchone()
+        return row is not None
+
+    def embed(self, texts: List[str]):
+        """Dense L2-normalized float32 vectors of `texts` in the index's space."""
+        from sklearn.preprocessing import normalize
+        return normalize(self.vectorizer.transform(texts)).astype(self._np.float32).toarray()
+
+    def add(self, resume_id: str, chunks: List[str], metadata: Dict = None) -> None:
+        """Add one resume (replacing an earlier version with the same id)."""
+        self.add_many([(resume_id, chunks, metadata)])
+
+    def add_many(self, items: Iterable[Tuple[str, List[str], Optional[Dict]]]) -> int:
+        """Add (resume_id, chunks, metadata) items in one append and one transaction.
+
+        Resumes without chunks are skipped; returns the number of resumes added.
+        """
+        np = self._np
+        items = [(rid, list(chunks), meta) for rid, chunks, meta in items if chunks]
+        # the last version of a repeated id wins
+        items = list({rid: (rid, chunks, meta) for rid, chunks, meta in items}.values())
+        if not items:
+            return 0
+        with span("candidate_index.add", resumes=len(items)):
+            vectors = self.embed([c for _, chunks, _ in items for c in chunks])
+            with self._lock:
+                self._kill([rid for rid, _, _ in items])
+                first = self._db.execute("SELECT COALESCE(MAX(ord), -1) + 1 FROM resumes").fetchone()[0]
+                owners = np.repeat(np.arange(first, first + len(items), dtype=np.int64),
+                                   [len(chunks) for _, chunks, _ in items])
+                with open(os.path.join(self.path, VECTORS_FILE), "ab") as f:
+                    f.write(vectors.tobytes())
+                with open(os.path.join(self.path, OWNERS_FILE), "ab") as f:
+                    f.write(owners.tobytes())
+                self._db.executemany(
+                    "INSERT INTO resumes (ord, id, metadata, rows) VALUES (?, ?, ?, ?)",
+                    [(first + i, rid, json.dumps(meta) if meta is not None else None, len(chunks))
+                     for i, (rid, chunks, meta) in enumerate(items)])
+                self._rows += len(owners)
+                self._set_meta(rows=self._rows, dead_rows=self._dead_rows)
+                self._db.commit()
+                self._mapped = self._alive = None
+                self._maybe_compact()
+        return len(items)
+
+    def delete(self, resume_id: str) -> bool:
+        """Remove a resume; returns False if it was not in the index."""
+        with self._lock:
+            found = self._kill([resume_id])
+            self._set_meta(dead_rows=self._dead_rows)
+            self._db.commit()
+            self._alive = None
+            self._maybe_compact()
+        return bool(found)
+
+    def _maybe_compact(self) -> None:
+        if self._dead_rows and self._dead_rows > COMPACT_RATIO * self._rows:
+            self._compact()
+
+    def _kill(self, resume_ids: List[str]) -> int:
+        """Mark live resumes dead (caller holds the lock and commits)."""
+        killed = 0
+        for rid in resume_ids:
+            row = self._db.execute("SELECT ord, rows FROM resumes WHERE id = ? AND alive = 1", (rid,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE resumes SET alive = 0 WHERE ord = ?", (row[0],))
+                self._dead_rows += row[1]
+                killed += 1
+        return killed
+
+    def compact(self) -> None:
+        """Rewrite the vector files without the rows of deleted resumes."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        np = self._np
+        with span("candidate_index.compact", rows=self._rows, dead_rows=self._dead_rows):
+            vectors, owners, _, _ = self._mapping()
+            keep = self._alive_mask()[owners]
+            for name, data in ((VECTORS_FILE, vectors), (OWNERS_FILE, owners)):
+                tmp = os.path.join(self.path, name + ".tmp")
+                with open(tmp, "wb") as f:
+                    for start in range(0, len(data), SEARCH_BLOCK_ROWS):
+                        block = slice(start, start + SEARCH_BLOCK_ROWS)
+                        f.write(np.ascontiguousarray(data[block][keep[block]]).tobytes())
+            self._mapped = None
+            del vectors, owners
+            for name in (VECTORS_FILE, OWNERS_FILE):
+                os.replace(os.path.join(self.path, name + ".tmp"), os.path.join(self.path, name))
+            self._db.execute("DELETE FROM resumes WHERE alive = 0")
+            self._rows, self._dead_rows = int(keep.sum()), 0
+            self._set_meta(rows=self._rows, dead_rows=0)
+            self._db.commit()
+            self._alive = None
+
+    def _mapping(self):
+        """Memory-mapped vectors and owners plus the start row and ordinal of each resume's rows."""
+        np = self._np
+        if self._mapped is None:
+            if self._rows == 0:
+                vectors = np.zeros((0, self.dim), dtype=np.float32)
+                owners = np.zeros(0, dtype=np.int64)
+            else:
+                vectors = np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=np.float32, mode="r",
+                                    shape=(self._rows, self.dim))
+                owners = np.memmap(os.path.join(self.path, OWNERS_FILE), dtype=np.int64, mode="r",
+                                   shape=(self._rows,))
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]]) if len(owners) else owners
+            self._mapped = (vectors, owners, starts, np.asarray(owners[starts]))
+        return self._mapped
+
+    def _alive_mask(self):
+        np = self._np
+        if self._alive is None:
+            ords = [row[0] for row in self._db.execute("SELECT ord FROM resumes WHERE alive = 1")]
+            size = self._db.execute("SELECT COALESCE(MAX(ord), -1) + 1 FROM resumes").fetchone()[0]
+            alive = np.zeros(size, dtype=bool)
+            alive[ords] = True
+            self._alive = alive
+        return self._alive
+
+    def search(self, job_description: str, k: int = 50) -> List[Dict]:
+        """The `k` best-matching live resumes, best first.
+
+        A resume scores by its best chunk; `pct` uses the same mapping as
+        semantic_score_matrix, so it is comparable with per-resume semantic scores.
+        Each hit is {"resume_id", "pct", "cosine", "chunk" (index within the resume), "metadata"}.
+        """
+        np = self._np
+        with span("candidate_index.search", k=k):
+            with self._lock:
+                vectors, _, starts, ordinals = self._mapping()
+                alive = self._alive_mask()
+            if not len(starts) or k <= 0:
+                return []
+            query = self.embed([job_description])[0]
+            sims = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+                sims[start:start + SEARCH_BLOCK_ROWS] = vectors[start:start + SEARCH_BLOCK_ROWS] @ query
+            best = np.maximum.reduceat(sims, starts)
+            best[~alive[ordinals]] = -np.inf
+            k = min(k, int(alive[ordinals].sum()))
+            if k == 0:
+                return []
+            top = np.argpartition(-best, k - 1)[:k]
+            top = top[np.argsort(-best[top], kind="stable")]
+
+            ends = np.r_[starts[1:], len(sims)]
+            placeholders = ",".join("?" * len(top))
+            with self._lock:
+                rows = {ord_: (rid, meta) for ord_, rid, meta in self._db.execute(
+                    f"SELECT ord, id, metadata FROM resumes WHERE ord IN ({placeholders})",
+                    [int(ordinals[g]) for g in top])}
+            hits = []
+            for g in top:
+                rid, meta = rows[int(ordinals[g])]
+                cos = float(best[g])
+                hits.append({
+                    "resume_id": rid,
+                    "pct": float(100.0 / (1.0 + np.exp(2.0 - 2.0 * cos))),
+                    "cosine": cos,
+                    "chunk": int(np.argmax(sims[starts[g]:ends[g]])),
+                    "metadata": json.loads(meta) if meta is not None else None,
+                })
+            return hits
+
+    def close(self) -> None:
+        with self._lock:
+            self._mapped = None
+            self._db.close()
@@ -0,0 +1,46 @@
+# embeddings/tfidf.py
+"""TF-IDF vectorizer helpers with no LangChain dependency.
+
+scikit-learn is imported on first use only, so importing this module is cheap.
+"""
+import os
+import threading
+from typing import List
+
+# Optional TF-IDF model fitted on a reference corpus (see tools/fit_embeddings.py)
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH")
+
+_shared_vectorizer = None
+_shared_lock = threading.Lock()
+
+def new_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(max_features=384, stop_words='english')
+
+def fit_embedding_model(texts: List[str], path: str):
+    """Fit the TF-IDF vectorizer once on a reference corpus (resumes + JDs) and save it."""
+    import joblib
+    vectorizer = new_vectorizer()
+    vectorizer.fit(texts)
+    joblib.dump(vectorizer, path)
+    return vectorizer
+
+def load_embedding_model(path: str):
+    """Load a fitted vectorizer. Its numpy arrays (e.g. the idf weights) are memory-mapped
+    read-only so worker processes share those pages; the `vocabulary_` dict is
+    unpickled into each process as usual."""
+    import joblib
+    from utils.tracing import span
+    with span("embeddings.load_model"):
+        return joblib.load(path, mmap_mode="r")
+
+def get_shared_vectorizer():
+    """The corpus-fitted vectorizer from EMBEDDING_MODEL_PATH, loaded once per process,
+    or None when no shared model is configured."""
+    global _shared_vectorizer
+    if not EMBEDDING_MODEL_PATH or not os.path.exists(EMBEDDING_MODEL_PATH):
+        return None
+    with _shared_lock:
+        if _shared_vectorizer is None:
+            _shared_vectorizer = load_embedding_model(EMBEDDING_MODEL_PATH)
+        return _shared_vectorizer
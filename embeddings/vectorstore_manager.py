@@ -1,19 +1,24 @@
 # embeddings/vectorstore_manager.py
 import os
+import hashlib
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain.embeddings.base import Embeddings
 import pickle
-from typing import List
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import List, Tuple
+from embeddings.tfidf import get_shared_vectorizer, new_vectorizer
+from utils.tracing import span
 
 class SimpleEmbeddings(Embeddings):
-    """Lightweight TF-IDF based embeddings (no ML model download needed)."""
+    """Lightweight TF-IDF based embeddings (no ML model download needed).
+
+    Pass an already fitted `vectorizer` (see fit_embedding_model) to make embedding a
+    pure transform, so vectors are comparable across resumes and processes.
+    """
     
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=384, stop_words='english')
-        self.is_fitted = False
+    def __init__(self, vectorizer=None):
+        self.vectorizer = vectorizer if vectorizer is not None else new_vectorizer()
+        self.is_fitted = vectorizer is not None
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of documents."""
@@ -32,30 +37,68 @@ class SimpleEmbeddings(Embeddings):
         vector = self.vectorizer.transform([text]).toarray()[0]
         return vector.tolist()
 
-VSTORE_PATH = "./vector_store.faiss"
-META_PATH = "./vector_store_meta.pkl"
+# Optional directory for persistent indexes, one sub-directory per resume content hash.
+# Unset means every analysis gets a throwaway in-memory index.
+VSTORE_DIR = os.getenv("VECTORSTORE_DIR")
+EMBEDDINGS_FILE = "embeddings.pkl"
 
 def get_embeddings(api_key: str = None):
-    """Use lightweight TF-IDF embeddings (no quota issues, no external dependencies)."""
-    return SimpleEmbeddings()
+    """Use lightweight TF-IDF embeddings (no quota issues, no external dependencies).
 
-def build_or_load_vectorstore(chunks: List[str], rebuild: bool = False):
-    """Given text chunks, build or load a FAISS vectorstore using lightweight embeddings."""
-    embeddings = get_embeddings()
-    if os.path.exists(VSTORE_PATH) and not rebuild:
+    When EMBEDDING_MODEL_PATH points at a fitted model it is loaded once per process and
+    shared; otherwise each call gets a vectorizer fitted on the first texts it sees.
+    """
+    return SimpleEmbeddings(get_shared_vectorizer())
+
+def content_hash(chunks: List[str]) -> str:
+    """Stable identifier for a set of chunks, used to key persistent indexes."""
+    h = hashlib.sha256()
+    for c in chunks:
+        h.update(c.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def build_vectorstore(chunks: List[str], embeddings=None, spans: List[Tuple[int, int]] = None):
+    """Build an in-memory FAISS vectorstore for the given chunks; nothing is written to disk.
+
+    `spans` (from chunk_spans) are stored as start/end metadata so hits can be highlighted.
+    """
+    if spans is not None:
+        docs = [Document(page_content=c, metadata={"start": s, "end": e}) for c, (s, e) in zip(chunks, spans)]
+    else:
+        docs = [Document(page_content=c) for c in chunks]
+    with span("vectorstore.build", chunks=len(chunks)):
+        return FAISS.from_documents(docs, embeddings or get_embeddings())
+
+def build_or_load_vectorstore(chunks: List[str], rebuild: bool = False, persist_dir: str = None,
+                              spans: List[Tuple[int, int]] = None):
+    """Return a FAISS vectorstore for `chunks`.
+
+    Without `persist_dir` (or VECTORSTORE_DIR) the index is ephemeral. Otherwise it is
+    stored under the chunks' content hash and reused on later calls for the same resume.
+    """
+    persist_dir = persist_dir or VSTORE_DIR
+    if not persist_dir:
+        return build_vectorstore(chunks, spans=spans)
+
+    path = os.path.join(persist_dir, content_hash(chunks))
+    if os.path.isdir(path) and not rebuild:
         try:
-            vs = FAISS.load_local(VSTORE_PATH, embeddings)
-            return vs
+            with span("vectorstore.load"):
+                # the fitted vectorizer is stored alongside so queries land in the same space
+                with open(os.path.join(path, EMBEDDINGS_FILE), "rb") as f:
+                    embeddings = pickle.load(f)
+                return FAISS.load_local(path, embeddings)
         except Exception:
             pass
 
-    docs = [Document(page_content=c) for c in chunks]
-    vs = FAISS.from_documents(docs, embeddings)
-    # persist
-    vs.save_local(VSTORE_PATH)
-    # save metadata (if needed)
-    with open(META_PATH, "wb") as f:
-        pickle.dump({"n_docs": len(docs)}, f)
+    embeddings = get_embeddings()
+    vs = build_vectorstore(chunks, embeddings, spans=spans)
+    with span("vectorstore.save"):
+        os.makedirs(path, exist_ok=True)
+        vs.save_local(path)
+        with open(os.path.join(path, EMBEDDINGS_FILE), "wb") as f:
+            pickle.dump(embeddings, f)
     return vs
 
 def semantic_search(vectorstore, query: str, k: int = 5):
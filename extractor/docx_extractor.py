@@ -1,8 +1,31 @@
 # extractor/docx_extractor.py
-from docx import Document
+import zipfile
 from typing import List
+from xml.etree.ElementTree import iterparse
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
 
 def extract_text_from_docx(path: str) -> str:
+    from docx import Document
     doc = Document(path)
     paragraphs: List[str] = [p.text for p in doc.paragraphs]
     return "\n".join(paragraphs).strip()
+
+def extract_text_from_docx_xml(path: str) -> str:
+    """Stream word/document.xml straight out of the zip, without building a document model."""
+    paragraphs: List[str] = []
+    current: List[str] = []
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as f:
+        for event, elem in iterparse(f, events=("end",)):
+            tag = elem.tag
+            if tag == _W + "t":
+                current.append(elem.text or "")
+            elif tag == _W + "tab":
+                current.append("\t")
+            elif tag in (_W + "br", _W + "cr"):
+                current.append("\n")
+            elif tag == _W + "p":
+                paragraphs.append("".join(current))
+                current = []
+                elem.clear()
+    return "\n".join(paragraphs).strip()
@@ -1,12 +1,97 @@
 # extractor/pdf_extractor.py
-import pdfplumber
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
 
-def extract_text_from_pdf(path: str) -> str:
-    """Extract text from PDF using pdfplumber. Returns concatenated text."""
-    text_chunks: List[str] = []
+# Page-extraction pool shared by every PDF parsed in this process (workers > 1 only)
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _page_text(page) -> str:
+    text = page.extract_text() or ""
+    # drop the page's cached layout objects as soon as we have its text
+    close = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+    if close:
+        close()
+    return text
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Worker: extract pages [start, stop) of one PDF."""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [_page_text(pdf.pages[i]) for i in range(start, min(stop, len(pdf.pages)))]
+
+def _submit_ranges(path: str, workers: int, ranges: List[tuple]) -> list:
+    """Submit page ranges to the shared page pool, creating it on first use and regrowing
+    it if more workers are asked for. Submitting under the lock means a pool is only
+    retired after its callers' tasks are queued; its queued tasks still run to completion."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or workers > _pool_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool, _pool_workers = ProcessPoolExecutor(max_workers=workers), workers
+        return [_pool.submit(_extract_page_range, path, start, stop) for start, stop in ranges]
+
+def iter_pdf_pages(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                   workers: int = 1, pages_per_task: int = 4) -> Iterator[str]:
+    """Yield page texts in order, stopping once `max_pages` pages or `max_chars` characters
+    have been produced. With workers > 1, page ranges are extracted in a process pool
+    that is reused across calls."""
+    import pdfplumber
+    chars = 0
     with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text_chunks.append(page_text)
-    return "\n".join(text_chunks).strip()
+        n_pages = len(pdf.pages)
+        if max_pages is not None:
+            n_pages = min(n_pages, max_pages)
+        if workers <= 1 or n_pages <= pages_per_task:
+            for i in range(n_pages):
+                text = _page_text(pdf.pages[i])
+                yield text
+                chars += len(text)
+                if max_chars is not None and chars >= max_chars:
+                    return
+            return
+
+    futures = _submit_ranges(path, workers, [(start, min(start + pages_per_task, n_pages))
+                                             for start in range(0, n_pages, pages_per_task)])
+    try:
+        for fut in futures:
+            for text in fut.result():
+                yield text
+                chars += len(text)
+                if max_chars is not None and chars >= max_chars:
+                    return
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+def extract_text_from_pdf(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                          workers: int = 1) -> str:
+    """Extract text from PDF using pdfplumber. Returns concatenated text, cut to the page/char budget."""
+    text = "\n".join(iter_pdf_pages(path, max_pages=max_pages, max_chars=max_chars, workers=workers)).strip()
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text
+
+def iter_pdf_pages_pypdf(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Iterator[str]:
+    """Yield page texts straight from the PDF text layer with pypdf (no layout analysis)."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    chars = 0
+    for i, page in enumerate(reader.pages):
+        if max_pages is not None and i >= max_pages:
+            return
+        text = page.extract_text() or ""
+        yield text
+        chars += len(text)
+        if max_chars is not None and chars >= max_chars:
+            return
+
+def extract_text_from_pdf_pypdf(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """Fast text-layer extraction; returns "" for scanned PDFs without a text layer."""
+    text = "\n".join(iter_pdf_pages_pypdf(path, max_pages=max_pages, max_chars=max_chars)).strip()
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text
@@ -0,0 +1,138 @@
+# extractor/registry.py
+"""Pick a text extraction backend by sniffing the file's magic bytes.
+
+Backends are registered per format in order of preference (fastest first). A backend is
+skipped when its modules are not installed, and the next one is tried when it returns no
+text (e.g. a scanned PDF without a text layer).
+"""
+import importlib.util
+import shutil
+import subprocess
+import zipfile
+from typing import Callable, Dict, List, Optional
+
+from utils.tracing import span
+
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class Backend:
+    def __init__(self, name: str, fn: Callable, requires: tuple = (), executable: str = None,
+                 layout: bool = False, budgets: bool = False):
+        self.name = name
+        self.fn = fn
+        self.requires = requires
+        self.executable = executable
+        self.layout = layout  # does layout analysis (slower, better reading order)
+        self.budgets = budgets  # accepts max_pages/max_chars/workers
+
+    def available(self) -> bool:
+        if any(importlib.util.find_spec(mod) is None for mod in self.requires):
+            return False
+        return self.executable is None or shutil.which(self.executable) is not None
+
+    def extract(self, path: str, **budget) -> str:
+        if self.budgets:
+            return self.fn(path, **budget)
+        return self.fn(path)
+
+
+_BACKENDS: Dict[str, List[Backend]] = {}
+
+
+def register_backend(fmt: str, backend: Backend, first: bool = False) -> None:
+    """Add a backend for `fmt`; `first=True` makes it the preferred one."""
+    backends = _BACKENDS.setdefault(fmt, [])
+    if first:
+        backends.insert(0, backend)
+    else:
+        backends.append(backend)
+
+
+def available_backends(fmt: str, layout: bool = False) -> List[Backend]:
+    backends = [b for b in _BACKENDS.get(fmt, []) if b.available()]
+    if layout:
+        # layout-aware backends first, the rest as fallbacks
+        backends.sort(key=lambda b: not b.layout)
+    return backends
+
+
+def sniff_format(path: str) -> str:
+    """Detect "pdf", "docx", "doc" or "txt" from the file contents rather than its extension."""
+    with open(path, "rb") as f:
+        head = f.read(8)
+    if head.startswith(_PDF_MAGIC):
+        return "pdf"
+    if head.startswith(_ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(path) as zf:
+                if "word/document.xml" in zf.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        raise ValueError(f"Unsupported archive format: {path}")
+    if head.startswith(_OLE_MAGIC):
+        return "doc"
+    return "txt"
+
+
+def extract_text(path: str, layout: bool = False, max_pages: Optional[int] = None,
+                 max_chars: Optional[int] = None, workers: int = 1) -> str:
+    """Extract text with the fastest available backend for the file's format."""
+    fmt = sniff_format(path)
+    backends = available_backends(fmt, layout=layout)
+    if not backends:
+        hint = " (convert legacy .doc files to .docx or PDF, or install antiword)" if fmt == "doc" else ""
+        raise ValueError(f"No text extraction backend available for {fmt!r} files ({path}){hint}")
+    budget = {"max_pages": max_pages, "max_chars": max_chars, "workers": workers}
+    text = ""
+    with span("extract", format=fmt) as s:
+        for backend in backends:
+            s.set(backend=backend.name)
+            text = backend.extract(path, **budget)
+            if text.strip():
+                break
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text
+
+
+# --- built-in backends ---------------------------------------------------------------
+
+def _pdf_pypdf(path, max_pages=None, max_chars=None, workers=1):
+    from extractor.pdf_extractor import extract_text_from_pdf_pypdf
+    return extract_text_from_pdf_pypdf(path, max_pages=max_pages, max_chars=max_chars)
+
+
+def _pdf_pdfplumber(path, max_pages=None, max_chars=None, workers=1):
+    from extractor.pdf_extractor import extract_text_from_pdf
+    return extract_text_from_pdf(path, max_pages=max_pages, max_chars=max_chars, workers=workers)
+
+
+def _docx_xml(path):
+    from extractor.docx_extractor import extract_text_from_docx_xml
+    return extract_text_from_docx_xml(path)
+
+
+def _docx_python_docx(path):
+    from extractor.docx_extractor import extract_text_from_docx
+    return extract_text_from_docx(path)
+
+
+def _doc_antiword(path):
+    return subprocess.run(["antiword", path], capture_output=True, check=True, text=True).stdout.strip()
+
+
+def _txt(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+register_backend("pdf", Backend("pypdf", _pdf_pypdf, requires=("pypdf",), budgets=True))
+register_backend("pdf", Backend("pdfplumber", _pdf_pdfplumber, requires=("pdfplumber",), layout=True, budgets=True))
+register_backend("docx", Backend("docx-xml", _docx_xml))
+register_backend("docx", Backend("python-docx", _docx_python_docx, requires=("docx",)))
+register_backend("doc", Backend("antiword", _doc_antiword, executable="antiword"))
+register_backend("txt", Backend("text", _txt))
@@ -1,23 +1,41 @@
 # extractor/text_utils.py
 import re
-from typing import List
+from typing import Iterator, List, Tuple
+
+# All cleaning rules in one alternation so the text is scanned once:
+# blank-line runs -> one blank line, lone CR/CRLF -> LF, space/tab runs -> one space,
+# and page markers like 'Page 1' or '1 / 4' are dropped.
+_CLEAN_RE = re.compile(
+    r"(?P<blank>(?:\r\n|\r(?!\n)|\n){2,})"
+    r"|(?P<newline>\r\n|\r)"
+    r"|(?P<space>[ \t]+)"
+    r"|(?P<page>(?i:Page)\s+\d+)"
+    r"|(?P<fraction>\b\d+\s*\/\s*\d+\b)"
+)
+_REPLACEMENTS = {"blank": "\n\n", "newline": "\n", "space": " ", "page": "", "fraction": ""}
+_WORD_RE = re.compile(r"\S+")
+
+def _clean_replace(m: "re.Match") -> str:
+    return _REPLACEMENTS[m.lastgroup]
 
 def clean_text(text: str) -> str:
     """Basic cleaning: remove excessive whitespace, page headers/footers heuristics."""
-    # Normalize whitespace
-    t = re.sub(r"\r\n|\r", "\n", text)
-    t = re.sub(r"\n{2,}", "\n\n", t)
-    t = re.sub(r"[ \t]+", " ", t)
-    # Remove repeating page numbers like '1 / 4' or 'Page 1'
-    t = re.sub(r"Page\s+\d+", "", t, flags=re.I)
-    t = re.sub(r"\b\d+\s*\/\s*\d+\b", "", t)
-    return t.strip()
+    return _CLEAN_RE.sub(_clean_replace, text).strip()
 
-def chunk_text(text: str, max_tokens_estimate: int = 1000, overlap: int = 200) -> List[str]:
-    """Simple word-based chunker. `max_tokens_estimate` is in words for simplicity."""
-    words = text.split()
-    if not words:
-        return []
+def chunk_spans(text: str, max_tokens_estimate: int = 1000, overlap: int = 200) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) character offsets of overlapping word windows in `text`.
+
+    Nothing is copied; materialize a chunk with text[start:end] when it is needed.
+    `max_tokens_estimate` is in words for simplicity.
+    """
+    starts: List[int] = []
+    ends: List[int] = []
+    for m in _WORD_RE.finditer(text):
+        starts.append(m.start())
+        ends.append(m.end())
+    n = len(starts)
+    if not n:
+        return
 
     # Ensure overlap is smaller than max chunk size to avoid infinite loops
     if overlap >= max_tokens_estimate:
@@ -28,10 +46,66 @@ def chunk_text(text: str, max_tokens_estimate: int = 1000, overlap: int = 200) -
     if stride <= 0:
         stride = max(1, max_tokens_estimate // 2)
 
-    chunks: List[str] = []
-    for start in range(0, len(words), stride):
-        end = min(start + max_tokens_estimate, len(words))
-        chunks.append(" ".join(words[start:end]))
-        if end >= len(words):
+    for start in range(0, n, stride):
+        end = min(start + max_tokens_estimate, n)
+        yield starts[start], ends[end - 1]
+        if end >= n:
             break
-    return chunks
+
+def chunk_text(text: str, max_tokens_estimate: int = 1000, overlap: int = 200) -> List[str]:
+    """Simple word-based chunker. `max_tokens_estimate` is in words for simplicity."""
+    return [text[s:e] for s, e in chunk_spans(text, max_tokens_estimate, overlap)]
+
+# Common resume section headings, matched at the start of a line
+_SECTION_RE = re.compile(
+    r"^[ \t]*(?P<name>(?:professional |work )?experience|employment(?: history)?|education|"
+    r"(?:technical |core )?skills|projects|summary|profile|objective|certifications?|"
+    r"awards|publications|languages|interests|volunteer(?:ing)?)[ \t]*:?[ \t]*$",
+    re.I | re.M,
+)
+CHARS_PER_TOKEN = 4  # rough average for English text with BPE tokenizers
+
+def estimate_tokens(text: str) -> int:
+    """Cheap provider-agnostic token estimate (~4 characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def section_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Split a resume on section headings (Experience, Education, Skills, ...).
+
+    Returns (name, start, end) offsets covering the whole text; text before the first
+    heading is named "header". Names are lower-cased headings.
+    """
+    spans: List[Tuple[str, int, int]] = []
+    name, start = "header", 0
+    for m in _SECTION_RE.finditer(text):
+        if m.start() > start or name != "header":
+            spans.append((name, start, m.start()))
+        name, start = m.group("name").lower(), m.start()
+    if start < len(text):
+        spans.append((name, start, len(text)))
+    return spans
+
+def token_chunk_spans(text: str, max_tokens: int = 1000, overlap_tokens: int = 200) -> Iterator[Tuple[int, int]]:
+    """Like chunk_spans, but windows are sized in estimated tokens and never cross a
+    section boundary, so every chunk stays within a model's context budget."""
+    if overlap_tokens >= max_tokens:
+        overlap_tokens = max(0, max_tokens // 2)
+    for _, sec_start, sec_end in section_spans(text):
+        words = [(m.start(), m.end()) for m in _WORD_RE.finditer(text, sec_start, sec_end)]
+        costs = [max(1, estimate_tokens(text[s:e])) for s, e in words]
+        i = 0
+        while i < len(words):
+            # extend the window while it fits (a single oversized word still forms a chunk)
+            j, used = i + 1, costs[i]
+            while j < len(words) and used + costs[j] <= max_tokens:
+                used += costs[j]
+                j += 1
+            yield words[i][0], words[j - 1][1]
+            if j >= len(words):
+                break
+            # next window starts ~overlap_tokens before this one ended, always moving forward
+            k, back = j, 0
+            while k - 1 > i and back + costs[k - 1] <= overlap_tokens:
+                k -= 1
+                back += costs[k]
+            i = k
@@ -1,58 +1,207 @@
 # main.py
-from extractor.pdf_extractor import extract_text_from_pdf
-from extractor.docx_extractor import extract_text_from_docx
-from extractor.text_utils import clean_text, chunk_text
-from embeddings.vectorstore_manager import build_or_load_vectorstore, semantic_search
+from extractor.registry import extract_text
+from extractor.text_utils import clean_text, token_chunk_spans
+from embeddings.tfidf import get_shared_vectorizer, new_vectorizer
 from chains.analysis_chain import Analyzer
-from utils.scoring import keyword_score, semantic_score
+from utils.chunk_cache import ChunkCache, fingerprint, get_chunk_cache
+from utils.scoring import JobKeywordIndex, resume_tokens, semantic_score, semantic_score_local, combined_score
+from utils.results import AnalysisResult, KeywordScore, Match, SemanticScore, Skills
+from utils.tracing import Trace, span
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import os
+import queue
+import threading
 
-def analyze_resume_file(resume_path: str, job_description: str, rebuild_index: bool = False, provider: str = None):
+# Extraction budgets so oversized uploads are cut short instead of fully parsed
+MAX_RESUME_PAGES = int(os.getenv("MAX_RESUME_PAGES", "20"))
+MAX_RESUME_CHARS = int(os.getenv("MAX_RESUME_CHARS", "100000"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+# Prefer layout-aware PDF extraction (pdfplumber) over the plain text layer
+PDF_LAYOUT = os.getenv("PDF_LAYOUT", "").lower() in ("1", "true", "yes")
+# Persistent FAISS indexes (LangChain) are only used when a store directory is configured;
+# otherwise semantic scoring runs straight on the TF-IDF vectors
+PERSIST_INDEX = bool(os.getenv("VECTORSTORE_DIR"))
+
+def load_resume_text(resume_path: str) -> str:
+    """Extract raw text from a PDF, DOCX or plain-text resume (format sniffed from content)."""
+    return extract_text(resume_path, layout=PDF_LAYOUT, max_pages=MAX_RESUME_PAGES,
+                        max_chars=MAX_RESUME_CHARS, workers=PDF_WORKERS)
+
+def load_cleaned_text(resume_path: str) -> str:
+    """Cleaned resume text; an upload identical to a recent one (e.g. only the JD was
+    edited) is not extracted again."""
+    with open(resume_path, "rb") as f:
+        key = fingerprint(f.read())
+    cleaned = _documents.get("document", key)
+    if cleaned is None:
+        raw = load_resume_text(resume_path)
+        with span("clean"):
+            cleaned = clean_text(raw)
+        _documents.set("document", key, cleaned)
+    return cleaned
+
+# whole documents are large, so only a few recent ones are kept (chunk results live in get_chunk_cache)
+_documents = ChunkCache(max_entries=64)
+
+_analyzers = {}
+_analyzers_lock = threading.Lock()
+
+def get_analyzer(provider: str, fused: bool = False) -> Analyzer:
+    """Process-wide Analyzer per (provider, fused); building one imports the LLM stack and
+    constructs clients, so it is done once and shared (Analyzer holds no per-request state)."""
+    with _analyzers_lock:
+        key = (provider, fused)
+        if key not in _analyzers:
+            _analyzers[key] = Analyzer(provider=provider, fused=fused)
+        return _analyzers[key]
+
+def split_chunks(cleaned: str):
+    """Token-budgeted chunk spans of a cleaned resume and the chunk strings."""
+    with span("chunk"):
+        spans = list(token_chunk_spans(cleaned))
+        return spans, [cleaned[s:e] for s, e in spans]
+
+
+def keyword_match(chunks, job_description: str):
+    """Keyword (pct, details) of a resume, given as its chunks, against a job description.
+
+    Same result as keyword_score on the whole text; token sets of chunks seen in earlier
+    revisions and the compiled JD index are reused."""
+    cache = get_chunk_cache()
+    with span("score.keyword"):
+        jd_key = fingerprint(job_description)
+        index = cache.get("jd_index", jd_key)
+        if index is None:
+            index = JobKeywordIndex(job_description)
+            cache.set("jd_index", jd_key, index)
+        token_sets = cache.get_many("tokens", chunks, lambda texts: [resume_tokens(t) for t in texts])
+        return index.score_tokens(frozenset().union(*token_sets))
+
+def semantic_match(chunks, spans, job_description: str, rebuild_index: bool = False):
+    """Semantic (pct, details) of the resume chunks against a job description."""
+    if PERSIST_INDEX:
+        from embeddings.vectorstore_manager import build_or_load_vectorstore
+        vs = build_or_load_vectorstore(chunks, rebuild=rebuild_index, spans=spans)
+        return semantic_score(vs, chunks, job_description)
+    vectorizer = get_shared_vectorizer()
+    if vectorizer is None:
+        # fitted on this resume alone, so its vectors change with any edit and are not cached
+        return semantic_score_local(new_vectorizer().fit(chunks), chunks, job_description, spans=spans)
+    import scipy.sparse
+    rows = get_chunk_cache().get_many(("vectors", id(vectorizer)), chunks,
+                                      lambda texts: list(vectorizer.transform(texts)))
+    chunk_vectors = scipy.sparse.vstack(rows, format="csr") if rows else None
+    return semantic_score_local(vectorizer, chunks, job_description, spans=spans, chunk_vectors=chunk_vectors)
+
+def build_result(keyword_pct, keyword_details, semantic_pct, semantic_details, llm_data: dict,
+                 trace: Trace = None) -> AnalysisResult:
+    """Assemble the AnalysisResult returned by analyze_resume_file; with a `trace`,
+    per-stage `timings` (ms) and per-call `llm_calls` are included."""
+    skills, match = llm_data["skills"], llm_data["match_chain"]
+    return AnalysisResult(
+        summary=llm_data["summary"],
+        skills=skills if isinstance(skills, Skills) else Skills.from_dict(skills),
+        strengths=llm_data["strengths"],
+        match=match if isinstance(match, Match) else Match.from_dict(match),
+        keyword=KeywordScore.from_details(keyword_pct, keyword_details),
+        semantic=SemanticScore.from_details(semantic_pct, semantic_details),
+        combined_match_pct=combined_score(keyword_pct, semantic_pct),
+        token_usage=llm_data["token_usage"],
+        timings=trace.timings() if trace is not None else None,
+        llm_calls=trace.llm_calls() if trace is not None else None,
+    )
+
+def iter_analysis_events(resume_path: str, job_description: str, rebuild_index: bool = False,
+                         provider: str = None, fused: bool = None):
+    """Run the analysis and yield progress events as sections become available.
+
+    Events are dicts {"event": name, "data": value}, in roughly this order:
+    keyword_score (KeywordScore), semantic_score (SemanticScore), combined_match_pct, then
+    summary_token pieces, summary, skills (Skills), strengths_token pieces, strengths and
+    match_chain (Match) as the LLM calls complete (LLM events may interleave), and finally
+    "result" with the AnalysisResult.
+    """
     if provider is None:
         provider = os.getenv("LLM_PROVIDER", "openai")
-    
-    ext = os.path.splitext(resume_path)[1].lower()
-    if ext == ".pdf":
-        raw = extract_text_from_pdf(resume_path)
-    elif ext in (".docx", ".doc"):
-        raw = extract_text_from_docx(resume_path)
-    else:
-        with open(resume_path, "r", encoding="utf-8") as f:
-            raw = f.read()
-    cleaned = clean_text(raw)
-    chunks = chunk_text(cleaned)
-    vs = build_or_load_vectorstore(chunks, rebuild=rebuild_index)
-
-    analyzer = Analyzer(provider=provider)
-    summary = analyzer.summarize(cleaned)
-    skills_data = analyzer.extract_skills_and_experience(cleaned)
-    strengths = analyzer.strengths_and_suggestions(cleaned)
-    match_data = analyzer.match_with_job(summary, job_description)
-
-    keyword_pct, keyword_details = keyword_score(cleaned, job_description)
-    semantic_pct, semantic_details = semantic_score(vs, chunks, job_description)
-
-    combined_pct = (keyword_pct * 0.4) + (semantic_pct * 0.6)
-
-    result = {
-        "summary": summary,
-        "skills": skills_data,
-        "strengths": strengths,
-        "match_chain": match_data,
-        "keyword_score": {"pct": keyword_pct, "details": keyword_details},
-        "semantic_score": {"pct": semantic_pct, "details": semantic_details},
-        "combined_match_pct": combined_pct,
-    }
-    return result
+    if fused is None:
+        fused = os.getenv("LLM_FUSED", "").lower() in ("1", "true", "yes")
+
+    # the trace is only activated around blocks without a yield, so the consumer's context is left alone
+    trace = Trace()
+    with trace.activate():
+        cleaned = load_cleaned_text(resume_path)
+        spans, chunks = split_chunks(cleaned)
+        analyzer = get_analyzer(provider, fused)
+        # the LLM thread runs in a copy of this context, so its spans land in the trace
+        llm_context = contextvars.copy_context()
+
+    events = queue.Queue()
+    # LLM calls run in the background while local scoring happens on this thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        llm_future = pool.submit(llm_context.run, analyzer.analyze_all, cleaned, job_description, on_event=events.put)
+        llm_future.add_done_callback(lambda f: events.put(None))
+
+        with trace.activate():
+            keyword_pct, keyword_details = keyword_match(chunks, job_description)
+        yield {"event": "keyword_score", "data": KeywordScore.from_details(keyword_pct, keyword_details)}
+
+        with trace.activate():
+            semantic_pct, semantic_details = semantic_match(chunks, spans, job_description, rebuild_index)
+        yield {"event": "semantic_score", "data": SemanticScore.from_details(semantic_pct, semantic_details)}
+        yield {"event": "combined_match_pct", "data": combined_score(keyword_pct, semantic_pct)}
+
+        for event in iter(events.get, None):
+            yield event
+        llm_data = llm_future.result()
+
+    result = build_result(keyword_pct, keyword_details, semantic_pct, semantic_details, llm_data, trace)
+    yield {"event": "result", "data": result}
+
+def result_events(result: AnalysisResult):
+    """Replay a finished result as the events iter_analysis_events would have produced."""
+    yield {"event": "keyword_score", "data": result.keyword}
+    yield {"event": "semantic_score", "data": result.semantic}
+    yield {"event": "combined_match_pct", "data": result.combined_match_pct}
+    yield {"event": "summary", "data": result.summary}
+    yield {"event": "skills", "data": result.skills}
+    yield {"event": "strengths", "data": result.strengths}
+    yield {"event": "match_chain", "data": result.match}
+    yield {"event": "result", "data": result}
+
+def analyze_resume_file(resume_path: str, job_description: str, rebuild_index: bool = False, provider: str = None,
+                        fused: bool = None) -> AnalysisResult:
+    for event in iter_analysis_events(resume_path, job_description, rebuild_index=rebuild_index,
+                                      provider=provider, fused=fused):
+        if event["event"] == "result":
+            return event["data"]
 
 if __name__ == "__main__":
     # simple test runner
     import argparse
     parser = argparse.ArgumentParser()
-    parser.add_argument("--resume", required=True)
-    parser.add_argument("--jd", required=True)
+    parser.add_argument("--resume")
+    parser.add_argument("--jd")
     parser.add_argument("--provider", default="openai", choices=["openai", "google"])
+    parser.add_argument("--fused", action="store_true", help="use a single consolidated LLM request")
+    # batch mode: N resumes x M job descriptions
+    parser.add_argument("--resumes", nargs="+", help="resume files, directories or globs (enables batch mode)")
+    parser.add_argument("--jds", nargs="+", help="job description files, directories or globs")
+    parser.add_argument("--output", default="batch_results.jsonl", help="results file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=4, help="extraction processes")
+    parser.add_argument("--llm-workers", type=int, default=4, help="concurrent LLM analyses (0 disables LLM)")
+    parser.add_argument("--batch-api", action="store_true", help="send LLM analyses as a provider batch job (slow, cheaper)")
     args = parser.parse_args()
-    res = analyze_resume_file(args.resume, args.jd, provider=args.provider)
-    import json
-    print(json.dumps(res, indent=2))
+    if args.resumes:
+        if not args.jds:
+            parser.error("--jds is required with --resumes")
+        from batch import run_batch
+        n = run_batch(args.resumes, args.jds, args.output, provider=args.provider, fused=args.fused,
+                      workers=args.workers, llm_workers=args.llm_workers, batch_api=args.batch_api)
+        print(f"Wrote {n} results to {args.output}")
+    else:
+        if not args.resume or not args.jd:
+            parser.error("--resume and --jd are required (or use --resumes/--jds for batch mode)")
+        res = analyze_resume_file(args.resume, args.jd, provider=args.provider, fused=args.fused)
+        from utils.results import dumps
+        print(dumps(res, indent=True).decode("utf-8"))
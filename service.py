@@ -0,0 +1,241 @@
+# service.py
+"""Async HTTP API around the resume analysis pipeline.
+
+    python service.py --port 8080
+
+POST /analyze   multipart: "resume" file + "job_description" field
+POST /batch     multipart: one or more "resume" files + one or more "job_description" fields
+GET  /health    queue depth, in-flight counts and provider rate limiter stats
+GET  /metrics   Prometheus stage latency histograms and LLM token/cache counters
+
+Parsing runs in a process pool and LLM calls in threads, each behind its own concurrency
+limit, so the event loop never blocks. When the bounded work queue is full the service
+answers 429 with a Retry-After header instead of piling up requests; a /batch with more
+resume x JD pairs than the whole queue holds is rejected with 400.
+"""
+import asyncio
+import contextvars
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from aiohttp import web
+
+from batch import _extract
+from chains.rate_limit import BATCH, INTERACTIVE, get_scheduler
+from utils.results import dumps_text
+from utils.tracing import Trace, render_prometheus, span
+
+QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "32"))  # analyses admitted but not finished
+EXTRACT_CONCURRENCY = int(os.getenv("SERVICE_EXTRACT_CONCURRENCY", str(os.cpu_count() or 2)))
+LLM_CONCURRENCY = int(os.getenv("SERVICE_LLM_CONCURRENCY", "8"))
+MAX_UPLOAD_BYTES = int(os.getenv("SERVICE_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+
+class Saturated(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"service saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AnalysisService:
+    """Admission control plus separate CPU (extraction) and LLM concurrency limits."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE, extract_concurrency: int = EXTRACT_CONCURRENCY,
+                 llm_concurrency: int = LLM_CONCURRENCY, provider: str = None, fused: bool = None):
+        self.queue_size = queue_size
+        self.provider = provider or os.getenv("LLM_PROVIDER", "openai")
+        self.fused = fused if fused is not None else os.getenv("LLM_FUSED", "").lower() in ("1", "true", "yes")
+        self.extract_limit = asyncio.Semaphore(extract_concurrency)
+        self.llm_limit = asyncio.Semaphore(llm_concurrency)
+        self.llm_concurrency = llm_concurrency
+        self.pool = ProcessPoolExecutor(max_workers=extract_concurrency)
+        self.pending = 0
+        self.in_flight = 0
+        self._avg_seconds = 5.0  # moving average of one analysis, for Retry-After
+
+    def admit(self, n: int = 1) -> None:
+        """Reserve queue slots for `n` analyses or raise Saturated."""
+        if self.pending + n > self.queue_size:
+            backlog = self.pending + n - self.queue_size
+            raise Saturated(max(1, math.ceil(self._avg_seconds * backlog / self.llm_concurrency)))
+        self.pending += n
+
+    def release(self, n: int = 1) -> None:
+        self.pending -= n
+
+    async def extract(self, path: str):
+        loop = asyncio.get_running_loop()
+        # the worker process's own spans are not visible here, so time the whole hop
+        with span("extract"):
+            async with self.extract_limit:
+                _, cleaned, _, error = await loop.run_in_executor(self.pool, partial(_extract, path, chunk=False))
+        if error is not None:
+            raise web.HTTPUnprocessableEntity(text=f"could not read resume: {error}")
+        return cleaned
+
+    async def analyze(self, cleaned: str, job_description: str, level: int = INTERACTIVE,
+                      trace: Trace = None) -> dict:
+        return (await self.analyze_jobs(cleaned, [job_description], level, trace))[0]
+
+    async def analyze_jobs(self, cleaned: str, job_descriptions: list, level: int = INTERACTIVE,
+                           trace: Trace = None) -> list:
+        """Results for one resume against each JD: the resume is chunked once and its
+        resume-only LLM calls are made once (see Analyzer.analyze_for_jobs)."""
+        from main import build_result, get_analyzer, keyword_match, semantic_match, split_chunks
+
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        trace = trace or Trace()
+        self.in_flight += 1
+        try:
+            analyzer = get_analyzer(self.provider, self.fused)
+
+            async def llm():
+                async with self.llm_limit:
+                    call = partial(analyzer.analyze_for_jobs, cleaned, job_descriptions, priority_level=level)
+                    return await loop.run_in_executor(None, contextvars.copy_context().run, call)
+
+            def local_scores():
+                spans, chunks = split_chunks(cleaned)
+                return [(keyword_match(chunks, jd), semantic_match(chunks, spans, jd)) for jd in job_descriptions]
+
+            with trace.activate():
+                # executor threads don't inherit contextvars, so each gets a copy carrying the trace
+                scores, llm_data = await asyncio.gather(
+                    loop.run_in_executor(None, contextvars.copy_context().run, local_scores), llm())
+            return [build_result(*keyword, *semantic, data, trace)
+                    for (keyword, semantic), data in zip(scores, llm_data)]
+        finally:
+            self.in_flight -= 1
+            # per (resume, JD) analysis, the unit queue slots and Retry-After are counted in
+            elapsed = (time.monotonic() - start) / max(1, len(job_descriptions))
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+SERVICE_KEY = web.AppKey("service", AnalysisService)
+
+
+async def _read_form(request: web.Request):
+    """Save uploaded resumes to temp files; returns (paths, job_descriptions).
+
+    On error the files saved so far are removed before the exception propagates."""
+    paths, jds = [], []
+    try:
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "resume":
+                suffix = os.path.splitext(part.filename or "")[1]
+                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                    paths.append(tmp.name)
+                    size = 0
+                    while chunk := await part.read_chunk():
+                        size += len(chunk)
+                        if size > MAX_UPLOAD_BYTES:
+                            raise web.HTTPRequestEntityTooLarge(max_size=MAX_UPLOAD_BYTES, actual_size=size)
+                        tmp.write(chunk)
+            elif part.name == "job_description":
+                jds.append(await part.text())
+    except BaseException:
+        for path in paths:
+            os.unlink(path)
+        raise
+    return paths, jds
+
+
+def _saturated_response(e: Saturated) -> web.Response:
+    return web.json_response({"error": str(e)}, status=429, headers={"Retry-After": str(e.retry_after)})
+
+
+async def handle_analyze(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    try:
+        service.admit()
+    except Saturated as e:
+        return _saturated_response(e)
+    paths = []
+    try:
+        paths, jds = await _read_form(request)
+        if len(paths) != 1 or len(jds) != 1:
+            raise web.HTTPBadRequest(text="expected one 'resume' file and one 'job_description' field")
+        trace = Trace()
+        with trace.activate():
+            cleaned = await service.extract(paths[0])
+        return web.json_response(await service.analyze(cleaned, jds[0], trace=trace), dumps=dumps_text)
+    finally:
+        service.release()
+        for path in paths:
+            os.unlink(path)
+
+
+async def handle_batch(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    paths = []
+    admitted = 0
+    try:
+        paths, jds = await _read_form(request)
+        if not paths or not jds:
+            raise web.HTTPBadRequest(text="expected 'resume' files and 'job_description' fields")
+        if len(paths) * len(jds) > service.queue_size:
+            # could never be admitted, so retrying later would not help
+            raise web.HTTPBadRequest(text=f"{len(paths)} resumes x {len(jds)} job descriptions exceeds "
+                                          f"the queue size of {service.queue_size} analyses per request")
+        try:
+            service.admit(len(paths) * len(jds))
+        except Saturated as e:
+            return _saturated_response(e)
+        admitted = len(paths) * len(jds)
+        # each resume is parsed and chunked once, then analyzed against every JD
+        cleaned = await asyncio.gather(*(service.extract(p) for p in paths))
+        results = await asyncio.gather(*(service.analyze_jobs(c, jds, BATCH) for c in cleaned))
+        return web.json_response([
+            {"resume_index": i, "jd_index": j, "result": r}
+            for i, per_jd in enumerate(results) for j, r in enumerate(per_jd)
+        ], dumps=dumps_text)
+    finally:
+        service.release(admitted)
+        for path in paths:
+            os.unlink(path)
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type="text/plain")
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    return web.json_response({"pending": service.pending, "in_flight": service.in_flight,
+                              "queue_size": service.queue_size, "rate_limits": get_scheduler().stats()})
+
+
+def create_app(service: AnalysisService = None) -> web.Application:
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES * 4)
+
+    async def startup(app):
+        app[SERVICE_KEY] = service or AnalysisService()
+
+    async def cleanup(app):
+        app[SERVICE_KEY].close()
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    app.router.add_post("/analyze", handle_analyze)
+    app.router.add_post("/batch", handle_batch)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
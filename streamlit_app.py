@@ -1,11 +1,13 @@
 # streamlit_app.py
 import streamlit as st
-from main import analyze_resume_file
+from main import iter_analysis_events, result_events
+from utils.results import dumps
+from collections import OrderedDict
+import hashlib
+import threading
 import tempfile
 import os
-import json
 from dotenv import load_dotenv
-import re
 load_dotenv()
 
 st.set_page_config(page_title="Resume Analyzer", layout="wide")
@@ -53,6 +55,31 @@ with st.sidebar:
     rebuild = st.checkbox("Rebuild embeddings/index", value=False)
     llm_provider = st.selectbox("LLM Provider", ["Google Gemini", "OpenAI"], index=0)
 
+PROVIDERS = {"Google Gemini": "google", "OpenAI": "openai"}
+MAX_CACHED_RESULTS = 128
+
+@st.cache_resource
+def result_store():
+    """Finished analyses shared by all sessions, keyed by (resume hash, JD hash, provider),
+    with the lock that guards them (sessions run in separate threads)."""
+    return OrderedDict(), threading.Lock()
+
+def cached_analysis(key):
+    store, lock = result_store()
+    with lock:
+        res = store.get(key)
+        if res is not None:
+            store.move_to_end(key)
+        return res
+
+def remember_result(key, res):
+    store, lock = result_store()
+    with lock:
+        store[key] = res
+        store.move_to_end(key)
+        while len(store) > MAX_CACHED_RESULTS:
+            store.popitem(last=False)
+
 uploaded_file = st.file_uploader("📤 Upload resume (PDF/DOCX/TXT)", type=["pdf","docx","txt"])
 job_desc = st.text_area("📋 Paste job description", height=150)
 job_file = st.file_uploader("📤 Or upload job description (TXT)", type=["txt"]) 
@@ -60,178 +87,201 @@ job_file = st.file_uploader("📤 Or upload job description (TXT)", type=["txt"]
 if job_file and not job_desc:
     job_desc = job_file.getvalue().decode("utf-8")
 
-if st.button("🚀 Analyze Resume", use_container_width=True):
-    if not uploaded_file:
-        st.error("❌ Please upload a resume file.")
-    elif not job_desc:
-        st.error("❌ Please provide a job description.")
+def render_match_score(score):
+    if score >= 80:
+        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Excellent", delta_color="inverse")
+    elif score >= 60:
+        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Good", delta_color="off")
+    else:
+        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Needs Work")
+
+def render_skills(skills):
+    if skills.raw is None:
+        cols = st.columns(2)
+        with cols[0]:
+            if skills.skills:
+                st.write("**Skills:**")
+                for skill in skills.skills[:10]:
+                    st.write(f"• {skill}")
+        with cols[1]:
+            if skills.experience_bullets:
+                st.write("**Experience:**")
+                for item in skills.experience_bullets[:5]:
+                    st.write(f"• {item}")
     else:
-        with st.spinner("⏳ Processing your resume and analyzing match..."):
-            # Save uploaded file to a temp path
-            suffix = os.path.splitext(uploaded_file.name)[1]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(uploaded_file.getbuffer())
-                tmp_path = tmp.name
-            try:
-                res = analyze_resume_file(tmp_path, job_desc, rebuild_index=rebuild)
-                st.success("✅ Analysis complete!")
-                
-                # Match Score - Prominent Display
-                score = res.get('combined_match_pct', 0)
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    if score >= 80:
-                        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Excellent", delta_color="inverse")
-                    elif score >= 60:
-                        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Good", delta_color="off")
-                    else:
-                        st.metric("🎯 Match Score", f"{score:.0f}%", delta="Needs Work")
-                
-                with col2:
-                    keyword_score = res.get("keyword_score", {}).get("score", 0)
-                    st.metric("🔑 Keywords Match", f"{keyword_score:.0f}%")
-                
-                with col3:
-                    semantic_score = res.get("semantic_score", {}).get("pct", 0)
-                    st.metric("🧠 Semantic Match", f"{semantic_score:.0f}%")
-                
-                # Resume Summary
-                st.subheader("📝 Resume Summary")
-                with st.expander("View Summary", expanded=True):
-                    st.write(res.get("summary", "No summary available"))
-                
-                # Skills Extraction
-                st.subheader("💼 Extracted Skills & Experience")
-                skills_data = res.get("skills", {})
-                if isinstance(skills_data, dict) and "raw" not in skills_data:
-                    cols = st.columns(2)
-                    with cols[0]:
-                        if "skills" in skills_data:
-                            st.write("**Skills:**")
-                            for skill in skills_data.get("skills", [])[:10]:
-                                st.write(f"• {skill}")
-                    with cols[1]:
-                        if "experience" in skills_data:
-                            st.write("**Experience:**")
-                            exp = skills_data.get("experience", "")
-                            if isinstance(exp, list):
-                                for item in exp[:5]:
-                                    st.write(f"• {item}")
-                            else:
-                                st.write(f"• {exp[:200]}...")
-                else:
-                    with st.expander("View Extracted Data"):
-                        st.json(skills_data)
-                
-                # Strengths & Weaknesses - Simplified
-                st.subheader("💡 Key Insights")
-                strengths_text = res.get("strengths", "")
-                
-                # Parse and highlight key points
-                if strengths_text:
-                    lines = strengths_text.split('\n')
-                    
-                    strengths = []
-                    weaknesses = []
-                    tips = []
-                    
-                    current_section = None
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        
-                        if "strength" in line.lower():
-                            current_section = "strengths"
-                        elif "weakness" in line.lower() or "suggestion" in line.lower() or "improvement" in line.lower():
-                            current_section = "weaknesses"
-                        elif "tip" in line.lower() or "recommendation" in line.lower():
-                            current_section = "tips"
-                        elif current_section and line.startswith(('•', '-', '*', '1', '2', '3', '4', '5')):
-                            # Clean the line
-                            clean_line = re.sub(r'^[•\-*\d.)\s]+', '', line).strip()
-                            if clean_line:
-                                if current_section == "strengths":
-                                    strengths.append(clean_line)
-                                elif current_section == "weaknesses":
-                                    weaknesses.append(clean_line)
-                                elif current_section == "tips":
-                                    tips.append(clean_line)
-                    
-                    # Display Strengths
-                    if strengths:
-                        st.markdown("### ✅ Your Strengths")
-                        for strength in strengths[:5]:  # Show top 5
-                            st.markdown(f'<div class="strength-box"><strong>✓</strong> {strength}</div>', unsafe_allow_html=True)
-                    
-                    # Display Weaknesses/Areas to Improve
-                    if weaknesses:
-                        st.markdown("### ⚠️ Areas to Improve")
-                        for i, weakness in enumerate(weaknesses[:5], 1):  # Show top 5
-                            st.markdown(f'<div class="weakness-box"><strong>{i}.</strong> {weakness}</div>', unsafe_allow_html=True)
-                    
-                    # Display Tips to Improve Score
-                    if not tips:
-                        # Generate actionable tips from analysis
-                        tips = [
-                            f"Add specific projects that use the required technologies",
-                            f"Highlight {res.get('keyword_score', {}).get('total_keywords', 0)} key job requirements in your resume",
-                            f"Use action verbs and quantifiable achievements (e.g., 'Improved performance by X%')",
-                            f"Include relevant certifications or training",
-                            f"Tailor your summary to emphasize job-relevant skills"
-                        ]
-                    
-                    st.markdown("### 🎯 How to Improve Your Score")
-                    for i, tip in enumerate(tips[:5], 1):
-                        st.markdown(f'<div class="tip-box"><strong>Tip {i}:</strong> {tip}</div>', unsafe_allow_html=True)
-                
-                # Score Breakdown
-                st.subheader("📊 Detailed Score Breakdown")
-                score_col1, score_col2 = st.columns(2)
-                
-                with score_col1:
-                    st.write("**Keyword Match Details:**")
-                    keyword_data = res.get("keyword_score", {})
-                    st.write(f"• Matched: {keyword_data.get('matched', [])[:10]}")
-                    st.write(f"• Total Keywords in Job: {keyword_data.get('total_keywords', 0)}")
-                
-                with score_col2:
-                    st.write("**Semantic Match Details:**")
-                    semantic_data = res.get("semantic_score", {})
-                    st.write(f"• Overall Match: {semantic_data.get('pct', 0):.1f}%")
-                
-                # Download Section
-                st.divider()
-                col1, col2 = st.columns(2)
-                with col1:
-                    json_str = json.dumps(res, indent=2)
-                    st.download_button(
-                        label="📥 Download Full Analysis (JSON)",
-                        data=json_str,
-                        file_name="resume_analysis.json",
-                        use_container_width=True
-                    )
-                
-                with col2:
-                    # Generate a text report
-                    report = f"""RESUME ANALYSIS REPORT
+        with st.expander("View Extracted Data"):
+            st.text(skills.raw)
+
+def render_insights(res):
+    insights = res.insights
+
+    # Display Strengths
+    if insights.strengths:
+        st.markdown("### ✅ Your Strengths")
+        for strength in insights.strengths[:5]:  # Show top 5
+            st.markdown(f'<div class="strength-box"><strong>✓</strong> {strength}</div>', unsafe_allow_html=True)
+
+    # Display Weaknesses/Areas to Improve
+    if insights.weaknesses:
+        st.markdown("### ⚠️ Areas to Improve")
+        for i, weakness in enumerate(insights.weaknesses[:5], 1):  # Show top 5
+            st.markdown(f'<div class="weakness-box"><strong>{i}.</strong> {weakness}</div>', unsafe_allow_html=True)
+
+    # Display Tips to Improve Score
+    tips = insights.tips
+    if not tips:
+        # Generate actionable tips from analysis
+        tips = [
+            f"Add specific projects that use the required technologies",
+            f"Highlight {res.keyword.total_keywords} key job requirements in your resume",
+            f"Use action verbs and quantifiable achievements (e.g., 'Improved performance by X%')",
+            f"Include relevant certifications or training",
+            f"Tailor your summary to emphasize job-relevant skills"
+        ]
+
+    st.markdown("### 🎯 How to Improve Your Score")
+    for i, tip in enumerate(tips[:5], 1):
+        st.markdown(f'<div class="tip-box"><strong>Tip {i}:</strong> {tip}</div>', unsafe_allow_html=True)
+
+def show_analysis(events):
+    """Render analysis events as they arrive; returns the final AnalysisResult."""
+    status = st.empty()
+    status.info("⏳ Processing your resume and analyzing match...")
+
+    # Sections are laid out up front and filled in as analysis events arrive
+    col1, col2, col3 = st.columns(3)
+    score_box, keyword_box, semantic_box = col1.empty(), col2.empty(), col3.empty()
+
+    st.subheader("📝 Resume Summary")
+    summary_box = st.expander("View Summary", expanded=True).empty()
+
+    st.subheader("💼 Extracted Skills & Experience")
+    skills_box = st.empty()
+
+    st.subheader("💡 Key Insights")
+    insights_box = st.empty()
+
+    res = None
+    summary_text = ""
+    strengths_text = ""
+    for event in events:
+        kind, data = event["event"], event["data"]
+        if kind == "keyword_score":
+            keyword_box.metric("🔑 Keywords Match", f"{data.pct:.0f}%")
+        elif kind == "semantic_score":
+            semantic_box.metric("🧠 Semantic Match", f"{data.pct:.0f}%")
+        elif kind == "combined_match_pct":
+            with score_box.container():
+                render_match_score(data)
+        elif kind == "summary_token":
+            summary_text += data
+            summary_box.markdown(summary_text + "▌")
+        elif kind == "summary":
+            summary_box.write(data or "No summary available")
+        elif kind == "skills":
+            with skills_box.container():
+                render_skills(data)
+        elif kind == "strengths_token":
+            strengths_text += data
+            insights_box.markdown(strengths_text + "▌")
+        elif kind == "strengths":
+            strengths_text = data
+            insights_box.empty()
+        elif kind == "result":
+            res = data
+
+    status.success("✅ Analysis complete!")
+    score = res.combined_match_pct
+
+    # Strengths & Weaknesses - Simplified
+    if strengths_text:
+        with insights_box.container():
+            render_insights(res)
+
+    # Score Breakdown
+    st.subheader("📊 Detailed Score Breakdown")
+    score_col1, score_col2 = st.columns(2)
+
+    with score_col1:
+        st.write("**Keyword Match Details:**")
+        st.write(f"• Matched: {res.keyword.matched[:10]}")
+        st.write(f"• Total Keywords in Job: {res.keyword.total_keywords}")
+
+    with score_col2:
+        st.write("**Semantic Match Details:**")
+        st.write(f"• Overall Match: {res.semantic.pct:.1f}%")
+
+    # Download Section
+    st.divider()
+    col1, col2 = st.columns(2)
+    with col1:
+        json_str = dumps(res, indent=True)
+        st.download_button(
+            label="📥 Download Full Analysis (JSON)",
+            data=json_str,
+            file_name="resume_analysis.json",
+            use_container_width=True
+        )
+
+    with col2:
+        # Generate a text report
+        report = f"""RESUME ANALYSIS REPORT
 =======================
 
 Match Score: {score:.1f}%
-Keyword Match: {res.get('keyword_score', {}).get('score', 0):.0f}%
-Semantic Match: {res.get('semantic_score', {}).get('pct', 0):.0f}%
+Keyword Match: {res.keyword.pct:.0f}%
+Semantic Match: {res.semantic.pct:.0f}%
 
 SUMMARY:
-{res.get('summary', '')}
+{res.summary}
 
 KEY AREAS TO IMPROVE:
 {strengths_text}
 """
-                    st.download_button(
-                        label="📥 Download Text Report",
-                        data=report,
-                        file_name="resume_report.txt",
-                        use_container_width=True
-                    )
-            finally:
-                os.unlink(tmp_path)
+        st.download_button(
+            label="📥 Download Text Report",
+            data=report,
+            file_name="resume_report.txt",
+            use_container_width=True
+        )
+    return res
+
+provider = PROVIDERS[llm_provider]
+analysis_key = None
+if uploaded_file and job_desc:
+    analysis_key = (
+        hashlib.sha256(uploaded_file.getbuffer()).hexdigest(),
+        hashlib.sha256(job_desc.encode("utf-8")).hexdigest(),
+        provider,
+    )
+
+clicked = st.button("🚀 Analyze Resume", use_container_width=True)
+if clicked:
+    if not uploaded_file:
+        st.error("❌ Please upload a resume file.")
+    elif not job_desc:
+        st.error("❌ Please provide a job description.")
+    else:
+        st.session_state["analysis_key"] = analysis_key
+
+# Once analyzed, results for the current inputs are re-rendered on every rerun (e.g. after a
+# download click) from the shared result store; "Rebuild" forces a fresh run on click.
+if analysis_key is not None and st.session_state.get("analysis_key") == analysis_key:
+    cached_result = None if (clicked and rebuild) else cached_analysis(analysis_key)
+    if cached_result is not None:
+        show_analysis(result_events(cached_result))
+    else:
+        # Save uploaded file to a temp path
+        suffix = os.path.splitext(uploaded_file.name)[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp.write(uploaded_file.getbuffer())
+            tmp_path = tmp.name
+        try:
+            res = show_analysis(iter_analysis_events(tmp_path, job_desc, rebuild_index=rebuild, provider=provider))
+            remember_result(analysis_key, res)
+        except Exception:
+            # don't retry a failed analysis on every rerun; wait for the next click
+            st.session_state.pop("analysis_key", None)
+            raise
+        finally:
+            os.unlink(tmp_path)
@@ -0,0 +1,264 @@
+# tests/test_analysis_chain.py
+import threading
+import time
+
+import pytest
+
+from chains.analysis_chain import GOOGLE_MODELS, Analyzer, _CircuitBreaker
+from chains.cache import ResponseCache
+from chains.rate_limit import BATCH, INTERACTIVE, RateLimiter
+
+
+def _google_analyzer(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    return Analyzer(provider="google", cache=False)
+
+
+def test_analyze_all_runs_independent_calls_concurrently(monkeypatch):
+    analyzer = _google_analyzer(monkeypatch)
+    # all three independent calls must be in flight at once to pass the barrier
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow(value):
+        def call(context):
+            barrier.wait()
+            time.sleep(0.01)
+            return value
+        return call
+
+    monkeypatch.setattr(analyzer, "summarize", slow("summary"))
+    monkeypatch.setattr(analyzer, "extract_skills_and_experience", slow({"skills": ["python"]}))
+    monkeypatch.setattr(analyzer, "strengths_and_suggestions", slow("strengths"))
+    monkeypatch.setattr(analyzer, "match_with_job", lambda s, jd: {"match_pct": 50, "summary_seen": s})
+
+    out = analyzer.analyze_all("resume text", "job text")
+    assert out["summary"] == "summary"
+    assert out["skills"] == {"skills": ["python"]}
+    assert out["strengths"] == "strengths"
+    assert out["match_chain"]["summary_seen"] == "summary"
+
+
+def test_analyze_for_jobs_runs_resume_calls_once(monkeypatch):
+    analyzer = _google_analyzer(monkeypatch)
+    prompts = []
+
+    def fake_call(prompt, key, schema=None):
+        prompts.append(prompt)
+        return '{"match_pct": 60, "explanation": "ok", "skills": [], "experience_bullets": []}'
+
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", fake_call)
+    out = analyzer.analyze_for_jobs("resume text", ["job one", "job two", "job three"])
+    assert len(prompts) == 3 + 3  # summary, skills, strengths once; one match per JD
+    assert [r["match_chain"].match_pct for r in out] == [60, 60, 60]
+    assert out[0]["token_usage"]["calls"] == 4
+    assert out[1]["token_usage"]["calls"] == out[2]["token_usage"]["calls"] == 1
+
+
+def test_analyze_fused_falls_back_only_for_bad_fields(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    analyzer = Analyzer(provider="google", fused=True, cache=False)
+    fused_out = '```json\n{"summary": "Senior dev", "skills": "python", "strengths": "Good", "match_pct": 72}\n```'
+    calls = []
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: calls.append(prompt) or fused_out)
+    monkeypatch.setattr(analyzer, "extract_skills_and_experience", lambda c: {"skills": ["python"]})
+
+    out = analyzer.analyze_all("resume text", "job text")
+    assert len(calls) == 1
+    assert out["summary"] == "Senior dev"
+    assert out["skills"] == {"skills": ["python"]}
+    assert out["match_chain"].match_pct == 72
+
+
+def test_response_cache_skips_repeat_calls(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    calls = []
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: calls.append(prompt) or "summary")
+
+    assert Analyzer(provider="google", cache=cache).summarize("resume text") == "summary"
+    assert Analyzer(provider="google", cache=cache).summarize("resume text") == "summary"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+    # a fresh front-end over the same file still hits
+    reopened = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    assert Analyzer(provider="google", cache=reopened).summarize("resume text") == "summary"
+    assert len(calls) == 1
+
+
+def test_response_cache_file_is_capped_and_expires(monkeypatch, tmp_path):
+    import types
+
+    now = [1000.0]
+    monkeypatch.setattr("chains.cache.time", types.SimpleNamespace(time=lambda: now[0]))
+    monkeypatch.setattr("chains.cache.PRUNE_EVERY", 1)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path=path, max_entries=1, ttl=60, max_rows=3)
+    for i in range(5):
+        now[0] += 1
+        cache.set(f"k{i}", str(i))
+
+    # the oldest rows beyond max_rows are gone from the file
+    reopened = ResponseCache(path=path, ttl=60, max_rows=3)
+    assert [reopened.get(f"k{i}") for i in range(5)] == [None, None, "2", "3", "4"]
+    now[0] += 120
+    assert reopened.get("k4") is None
+
+
+def test_circuit_breaker_opens_after_repeated_failures():
+    breaker = _CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure("gemini-2.5-flash")
+    assert not breaker.is_open("gemini-2.5-flash")
+    breaker.record_failure("gemini-2.5-flash")
+    assert breaker.is_open("gemini-2.5-flash")
+    assert not breaker.is_open("gemini-2.5-pro")
+    breaker.record_success("gemini-2.5-flash")
+    assert not breaker.is_open("gemini-2.5-flash")
+
+
+# satisfies both the skills and the match schema
+_VALID_JSON = '{"skills": [], "experience_bullets": [], "match_pct": 50, "explanation": ""}'
+
+
+def test_oversized_context_is_trimmed_and_usage_reported(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    analyzer = Analyzer(provider="google", cache=False, max_context_tokens=50)
+    prompts = []
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: prompts.append(prompt) or _VALID_JSON)
+
+    resume = "Skills\nPython, AWS\n\nEducation\n" + "coursework " * 200
+    out = analyzer.analyze_all(resume, "job text")
+    assert all("Python, AWS" in p for p in prompts if "job text" not in p)
+    assert all(len(p) < 600 for p in prompts)
+    usage = out["token_usage"]
+    assert usage["calls"] == 4
+    assert usage["context_trimmed"] is True
+    assert usage["prompt_tokens"] > 0
+
+
+def test_analyze_all_streams_events(monkeypatch):
+    analyzer = _google_analyzer(monkeypatch)
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: '{"skills": []}')
+    monkeypatch.setattr("chains.analysis_chain._stream_google_api", lambda prompt, key: iter(["Strong ", "candidate"]))
+    events = []
+
+    out = analyzer.analyze_all("resume text", "job text", on_event=events.append)
+    kinds = [e["event"] for e in events]
+    assert kinds.count("summary_token") == 2
+    assert {"summary", "skills", "strengths", "match_chain"} <= set(kinds)
+    assert kinds.index("summary_token") < kinds.index("summary")
+    assert out["summary"] == "Strong candidate"
+
+
+def test_rate_limiter_serves_interactive_before_batch():
+    limiter = RateLimiter(rpm=600)  # 10 requests/s, bucket of 100
+    limiter.requests.level = 0
+    order = []
+
+    def call(name, level):
+        limiter.acquire(level=level)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"batch{i}", BATCH)) for i in range(3)]
+    threads.append(threading.Thread(target=call, args=("interactive", INTERACTIVE)))
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    for t in threads:
+        t.join()
+    # the bucket is empty until 0.1s, so the interactive call overtakes every batch call
+    assert order == ["interactive", "batch0", "batch1", "batch2"]
+    stats = limiter.stats()
+    assert stats["calls"] == 4 and stats["queue_depth"] == 0 and stats["max_wait_s"] > 0
+
+
+def test_rate_limiter_enforces_tokens_per_minute():
+    limiter = RateLimiter(tpm=60_000)  # 1000 tokens/s, bucket of 10000
+    assert limiter.acquire(tokens=10_000) < 0.01
+    assert 0.15 < limiter.acquire(tokens=200) < 0.5
+
+
+def test_rate_limits_are_opt_in_and_fit_one_analysis(monkeypatch):
+    from chains.rate_limit import Scheduler
+
+    monkeypatch.delenv("LLM_RPM", raising=False)
+    monkeypatch.delenv("LLM_TPM", raising=False)
+    monkeypatch.delenv("LLM_RATE_LIMITS", raising=False)
+    limiter = Scheduler().limiter("google", "gemini-2.5-flash")
+    assert limiter.requests is None and limiter.tokens is None
+
+    monkeypatch.setenv("LLM_RATE_LIMITS", "free-tier")
+    limiter = Scheduler().limiter("google", "gemini-2.5-flash")
+    # 10 requests/min, but one analysis's fan-out still goes out without waiting
+    assert all(limiter.acquire() < 0.01 for _ in range(4))
+
+
+def test_google_client_retries_injected_429_against_fake_server(monkeypatch):
+    pytest.importorskip("requests")
+    from chains.rate_limit import Scheduler
+    from tools.fake_llm_server import FakeLLMServer
+
+    monkeypatch.setattr("chains.analysis_chain.get_scheduler", lambda: Scheduler(limits={}))
+    analyzer = _google_analyzer(monkeypatch)
+    with FakeLLMServer(faults=[429, 500], retry_after=0.01) as server:
+        base = server.url + "/v1beta/models/{model}"
+        monkeypatch.setattr("chains.analysis_chain.GOOGLE_API_URL", base + ":generateContent")
+        monkeypatch.setattr("chains.analysis_chain.BACKOFF_BASE", 0.01)
+        assert analyzer.summarize("resume text") == "Fake summary."
+    assert server.statuses == {429: 1, 500: 1, 200: 1}
+
+
+def test_client_errors_fail_fast_without_tripping_the_breaker(monkeypatch):
+    requests = pytest.importorskip("requests")
+    from chains.rate_limit import Scheduler
+    from tools.fake_llm_server import FakeLLMServer
+
+    breaker = _CircuitBreaker(threshold=1)
+    monkeypatch.setattr("chains.analysis_chain._breaker", breaker)
+    monkeypatch.setattr("chains.analysis_chain.get_scheduler", lambda: Scheduler(limits={}))
+    analyzer = _google_analyzer(monkeypatch)
+    with FakeLLMServer(faults=[401]) as server:
+        monkeypatch.setattr("chains.analysis_chain.GOOGLE_API_URL", server.url + "/v1beta/models/{model}:generateContent")
+        with pytest.raises(requests.exceptions.HTTPError):
+            analyzer.summarize("resume text")
+    # no retry, no failover to the next model, and the endpoint stays healthy
+    assert server.statuses == {401: 1}
+    assert not any(breaker.is_open(m) for m in GOOGLE_MODELS)
+
+
+def test_parse_json_tolerates_fences_and_prose():
+    from chains.analysis_chain import _parse_json
+
+    assert _parse_json('{"a": 1}') == {"a": 1}
+    assert _parse_json('```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+    assert _parse_json('Sure! Here it is: {"a": "x}"} Hope that {helps}.') == {"a": "x}"}
+    assert _parse_json("Result {not json} then [1, 2]") == [1, 2]
+    with pytest.raises(ValueError):
+        _parse_json("no structured output here")
+
+
+def test_structured_prompt_retries_only_on_schema_failure(monkeypatch):
+    analyzer = _google_analyzer(monkeypatch)
+    replies = iter(['Here you go: {"match_pct": "high"}', '```json\n{"match_pct": 80, "explanation": "ok"}\n```'])
+    calls = []
+    monkeypatch.setattr("chains.analysis_chain._call_google_api",
+                        lambda prompt, key, schema=None: calls.append(schema) or next(replies))
+
+    match = analyzer.match_with_job("summary", "job")
+    assert (match.match_pct, match.explanation) == (80, "ok")
+    assert len(calls) == 2 and calls[0]["required"] == ["match_pct", "explanation"]
+
+    calls.clear()
+    monkeypatch.setattr("chains.analysis_chain._call_google_api",
+                        lambda prompt, key, schema=None: calls.append(schema) or 'Skills: {"skills": ["go"], "experience_bullets": []}')
+    assert analyzer.extract_skills_and_experience("resume").skills == ["go"]
+    assert len(calls) == 1
+
+
+def test_structured_retry_keeps_parsed_value_with_its_output(monkeypatch):
+    from chains.analysis_chain import _SKILLS_PROMPT
+
+    analyzer = _google_analyzer(monkeypatch)
+    replies = iter(['{"skills": "go"}', "sorry, no JSON this time"])
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: next(replies))
+    assert analyzer._complete_json(_SKILLS_PROMPT, None, context="resume") == ({"skills": "go"}, '{"skills": "go"}')
@@ -0,0 +1,24 @@
+# tests/test_batch.py
+import json
+
+from batch import RESUME_EXTS, expand_paths, load_completed
+
+
+def test_expand_paths_accepts_dirs_and_globs(tmp_path):
+    (tmp_path / "a.pdf").write_text("x")
+    (tmp_path / "b.txt").write_text("x")
+    (tmp_path / "notes.png").write_text("x")
+    from_dir = expand_paths([str(tmp_path)], RESUME_EXTS)
+    from_glob = expand_paths([str(tmp_path / "*")], RESUME_EXTS)
+    assert [p.rsplit("/", 1)[-1] for p in from_dir] == ["a.pdf", "b.txt"]
+    assert from_dir == from_glob
+
+
+def test_load_completed_skips_partial_and_errored_rows(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(
+        json.dumps({"resume": "r1", "jd": "j1", "combined_match_pct": 50}) + "\n"
+        + json.dumps({"resume": "r2", "jd": "j1", "error": "boom"}) + "\n"
+        + '{"resume": "r3", "jd'
+    )
+    assert load_completed(str(out)) == {("r1", "j1")}
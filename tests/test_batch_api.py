@@ -0,0 +1,61 @@
+# tests/test_batch_api.py
+import pytest
+
+pytest.importorskip("requests")
+
+from chains.analysis_chain import _MATCH_PROMPT, Analyzer
+from chains.batch_api import GoogleBatchClient, OpenAIBatchClient, run_job
+from chains.cache import ResponseCache
+from utils.results import Match
+from tools.fake_llm_server import FakeLLMServer
+
+
+def test_google_batch_mode_maps_results_back_and_dedupes_prompts(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr("chains.analysis_chain._call_google_api",
+                        lambda prompt, key, schema=None: pytest.fail("batch results should be served from the cache"))
+    analyzer = Analyzer(provider="google", cache=False)
+    items = {"a-jd1": ("resume A", "jd one"), "a-jd2": ("resume A", "jd two"), "b-jd1": ("resume B", "jd one")}
+
+    with FakeLLMServer(polls_until_done=2) as server:
+        client = GoogleBatchClient("gemini-2.5-flash", api_key="test-key", base_url=server.url + "/v1beta")
+        results = analyzer.analyze_batch(items, client=client, poll_interval=0)
+
+    assert set(results) == set(items)
+    assert results["a-jd1"]["summary"] == "Fake summary."
+    assert results["b-jd1"]["match_chain"] == Match(50, "Fake explanation.")
+    # resume A's summary/skills/strengths are submitted once for both JDs; the match
+    # prompts for "a-jd1" and "b-jd1" are identical (same summary and JD)
+    assert [len(prompts) for prompts in server.submitted] == [6, 2]
+    # structured prompts (skills, match) carry their response schema, as regular calls do
+    structured = [sum("generationConfig" in item["request"] for item in job["items"]) for job in server.jobs.values()]
+    assert structured == [2, 2]
+
+
+def test_openai_batch_client_round_trip():
+    with FakeLLMServer(responder=lambda prompt: prompt.upper()) as server:
+        client = OpenAIBatchClient("gpt-4o-mini", api_key="test-key", base_url=server.url + "/v1")
+        assert run_job(client, {"k1": "hello", "k2": "world"}, poll_interval=0,
+                       prompt_defs={"k1": _MATCH_PROMPT}) == {"k1": "HELLO", "k2": "WORLD"}
+        bodies = {line["custom_id"]: line["body"] for job in server.jobs.values() for line in job["lines"]}
+    assert bodies["k1"]["response_format"]["json_schema"]["name"] == _MATCH_PROMPT["name"]
+    assert "response_format" not in bodies["k2"]
+
+
+def test_failing_item_does_not_discard_the_job(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    analyzer = Analyzer(provider="google", cache=ResponseCache(path=None))
+    real = analyzer.analyze_all
+
+    def analyze_all(context, jd):
+        if context == "resume B":
+            raise ValueError("bad resume")
+        return real(context, jd)
+
+    monkeypatch.setattr(analyzer, "analyze_all", analyze_all)
+    with FakeLLMServer() as server:
+        client = GoogleBatchClient("gemini-2.5-flash", api_key="test-key", base_url=server.url + "/v1beta")
+        results = analyzer.analyze_batch({"a": ("resume A", "jd"), "b": ("resume B", "jd")},
+                                         client=client, poll_interval=0)
+    assert results["a"]["summary"] == "Fake summary."
+    assert results["b"] == {"error": "ValueError: bad resume"}
@@ -0,0 +1,24 @@
+# tests/test_bench_pipeline.py
+import pytest
+
+from extractor.registry import available_backends
+from main import load_resume_text
+from tools.bench_pipeline import compare, make_corpus, percentile
+
+
+@pytest.mark.skipif(not available_backends("pdf"), reason="no PDF backend (pypdf or pdfplumber) installed")
+def test_synthetic_corpus_extracts_in_every_format(tmp_path):
+    paths = make_corpus(str(tmp_path), 3, seed=1)
+    assert [p.rsplit(".", 1)[1] for p in paths] == ["pdf", "docx", "txt"]
+    texts = [load_resume_text(p) for p in paths]
+    assert all("Experience" in t and "Skills" in t for t in texts)
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"phases": {"end_to_end": {"p95_ms": 200.0, "resumes_per_sec": 20.0, "peak_rss_mb": 100.0}}}
+    ok = {"end_to_end": {"p95_ms": 250.0, "resumes_per_sec": 15.0, "peak_rss_mb": 120.0}}
+    slow = {"end_to_end": {"p95_ms": 400.0, "resumes_per_sec": 8.0, "peak_rss_mb": 100.0}}
+    assert compare(ok, baseline, tolerance=0.5) == []
+    assert [r.split(":")[0] for r in compare(slow, baseline, tolerance=0.5)] == [
+        "end_to_end.p95_ms", "end_to_end.resumes_per_sec"]
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([1, 2, 3, 4], 95) == 4
@@ -0,0 +1,36 @@
+# tests/test_candidate_index.py
+import pytest
+
+
+def test_candidate_index_ranks_updates_and_persists(tmp_path):
+    pytest.importorskip("numpy")
+    pytest.importorskip("sklearn")
+    from embeddings.candidate_index import CandidateIndex
+    from embeddings.tfidf import new_vectorizer
+
+    pool = {
+        "py": ["python developer django", "sql postgres"],
+        "java": ["java spring backend"],
+        "ml": ["machine learning python pytorch"],
+        "ops": ["kubernetes docker aws"],
+    }
+    vectorizer = new_vectorizer().fit([c for chunks in pool.values() for c in chunks])
+    index = CandidateIndex(str(tmp_path), vectorizer)
+    assert index.add_many([(rid, chunks, {"file": rid}) for rid, chunks in pool.items()]) == 4
+
+    hits = index.search("senior postgres sql engineer", k=2)
+    assert len(hits) == 2 and hits[0]["resume_id"] == "py"
+    assert hits[0]["chunk"] == 1 and hits[0]["metadata"] == {"file": "py"}
+    assert hits[0]["pct"] >= hits[1]["pct"]
+
+    assert index.delete("py") and not index.delete("py")
+    index.add("ops", ["python django developer"])  # replaces the earlier version
+    assert len(index) == 3
+    index.close()
+
+    reopened = CandidateIndex(str(tmp_path))
+    ranked = [h["resume_id"] for h in reopened.search("python django", k=10)]
+    assert ranked[0] == "ops" and "py" not in ranked and len(ranked) == 3
+    reopened.compact()
+    assert reopened._dead_rows == 0
+    assert [h["resume_id"] for h in reopened.search("python django", k=10)] == ranked
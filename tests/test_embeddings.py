@@ -0,0 +1,24 @@
+# tests/test_embeddings.py
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("joblib")
+
+
+def test_fitted_model_round_trips_through_mmap_load(tmp_path):
+    pytest.importorskip("langchain_community")
+    from embeddings.tfidf import fit_embedding_model, load_embedding_model
+    from embeddings.vectorstore_manager import SimpleEmbeddings
+
+    corpus = ["python developer with aws and kubernetes", "java engineer, spring and sql",
+              "data scientist: python, pandas, sql"]
+    path = str(tmp_path / "model.joblib")
+    fitted = fit_embedding_model(corpus, path)
+    loaded = load_embedding_model(path)
+    assert (loaded.transform(corpus) != fitted.transform(corpus)).nnz == 0
+
+    # embedding is a pure transform: every instance (and process) gets the same vectors
+    first, second = SimpleEmbeddings(loaded), SimpleEmbeddings(load_embedding_model(path))
+    assert first.embed_documents(["sql and python"]) == second.embed_documents(["sql and python"])
+    assert first.embed_query("kubernetes") == second.embed_query("kubernetes")
+    assert first.embed_documents(corpus[:1]) == second.embed_documents(corpus[:1])
@@ -1,4 +1,6 @@
 # tests/test_extractors.py
+import pytest
+
 from extractor.text_utils import clean_text, chunk_text
 
 def test_clean_and_chunk():
@@ -13,3 +15,62 @@ def test_clean_and_chunk():
     assert "Page" not in cleaned
     chunks = chunk_text(cleaned, max_tokens_estimate=10, overlap=2)
     assert len(chunks) >= 1
+
+def _write_docx(path, paragraphs):
+    import zipfile
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t>{p}</w:t></w:r></w:p>" for p in paragraphs)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>')
+
+def test_registry_sniffs_content_not_extension(tmp_path):
+    from extractor.registry import extract_text, sniff_format
+
+    docx = tmp_path / "resume.pdf"  # wrong extension on purpose
+    _write_docx(docx, ["John Doe", "Python developer"])
+    assert sniff_format(str(docx)) == "docx"
+    assert extract_text(str(docx)) == "John Doe\nPython developer"
+
+    txt = tmp_path / "resume.docx"
+    txt.write_text("plain text resume")
+    assert sniff_format(str(txt)) == "txt"
+    assert extract_text(str(txt), max_chars=5) == "plain"
+
+    doc = tmp_path / "legacy.doc"
+    doc.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 64)
+    assert sniff_format(str(doc)) == "doc"
+
+def test_chunk_spans_are_offsets_into_text():
+    from extractor.text_utils import chunk_spans
+
+    text = "one two\nthree  four five"
+    spans = list(chunk_spans(text, max_tokens_estimate=3, overlap=1))
+    assert [text[s:e] for s, e in spans] == ["one two\nthree", "three  four five"]
+    assert chunk_text(text, max_tokens_estimate=3, overlap=1) == [text[s:e] for s, e in spans]
+
+def test_pdf_page_budgets_and_shared_pool(tmp_path):
+    pytest.importorskip("pdfplumber")
+    from extractor import pdf_extractor
+    from extractor.pdf_extractor import extract_text_from_pdf, iter_pdf_pages
+    from tools.bench_pipeline import write_pdf
+
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, "\n".join(f"Line {i} of the resume" for i in range(20)), lines_per_page=2)
+    pages = list(iter_pdf_pages(path))
+    assert len(pages) == 10 and "Line 19" in pages[-1]
+
+    assert list(iter_pdf_pages(path, max_pages=3)) == pages[:3]
+    assert list(iter_pdf_pages(path, max_chars=len(pages[0]) + 1)) == pages[:2]
+    assert len(extract_text_from_pdf(path, max_chars=30)) == 30
+
+    # the pool path returns the same pages in order and keeps one pool across calls
+    assert list(iter_pdf_pages(path, workers=2, pages_per_task=3)) == pages
+    pool = pdf_extractor._pool
+    assert list(iter_pdf_pages(path, max_pages=7, workers=2, pages_per_task=3)) == pages[:7]
+    assert pdf_extractor._pool is pool
+    # regrowing the pool mid-read does not break a read that is still using the old one
+    reading = iter_pdf_pages(path, workers=2, pages_per_task=1)
+    first = next(reading)
+    assert list(iter_pdf_pages(path, workers=3, pages_per_task=3)) == pages
+    assert pdf_extractor._pool is not pool
+    assert [first, *reading] == pages
@@ -0,0 +1,30 @@
+# tests/test_import_time.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 500
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_community", "langchain_openai", "faiss",
+                 "sklearn", "numpy", "pdfplumber", "pypdf", "docx", "requests"]
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def test_main_import_stays_within_budget():
+    stderr = _run("import main", "-X", "importtime").stderr
+    # lines look like "import time:  self [us] | cumulative | module"
+    cumulative = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cum, name = line.split("|")
+            if cum.strip().isdigit():
+                cumulative[name.strip()] = int(cum)
+    assert cumulative["main"] / 1000 < IMPORT_BUDGET_MS
+
+
+def test_main_import_does_not_load_heavy_dependencies():
+    code = "import sys, main; print(' '.join(m for m in sys.modules if m.split('.')[0] in %r))" % HEAVY_MODULES
+    assert _run(code).stdout.strip() == ""
@@ -0,0 +1,29 @@
+# tests/test_results.py
+from main import build_result
+from utils.results import AnalysisResult, Match, Skills, dumps, loads
+
+
+def test_result_round_trips_compactly():
+    llm_data = {
+        "summary": "Backend engineer.",
+        "skills": Skills(["python", "sql"], ["Built APIs"]),
+        "strengths": "Strengths:\n- Strong Python\nWeaknesses:\n1. No cloud experience\nTips:\n* Add AWS projects",
+        "match_chain": Match(raw="not json"),
+        "token_usage": {"prompt_tokens": 10},
+    }
+    semantic_details = [{"text": "python " * 40, "score": 0.5, "pct": 37.7, "start": 0, "end": 280}]
+    result = build_result(50.0, {"matched": ["python"], "total_keywords": 2}, 37.7, semantic_details, llm_data)
+
+    assert result.insights.strengths == ["Strong Python"]
+    assert result.insights.weaknesses == ["No cloud experience"]
+    assert result.insights.tips == ["Add AWS projects"]
+    assert result.match.raw == "not json" and result.match.match_pct is None
+    assert result.keyword.pct == 50.0 and result.keyword.total_keywords == 2
+
+    data = loads(dumps(result))
+    # hits point into the cleaned resume and carry a short excerpt instead of the whole chunk
+    hit = data["semantic_score"]["hits"][0]
+    assert (hit["start"], hit["end"]) == (0, 280)
+    assert len(hit["text"]) <= 120 and hit["text"].startswith("python python") and hit["text"].endswith("…")
+    assert "timings" not in data
+    assert AnalysisResult.from_dict(data) == result
@@ -1,4 +1,6 @@
 # tests/test_scoring.py
+import pytest
+
 from utils.scoring import keyword_score
 
 def test_keyword_score():
@@ -7,3 +9,69 @@ def test_keyword_score():
     score, details = keyword_score(resume, jd)
     assert score >= 0
     assert isinstance(details, dict)
+
+def test_cosine_similarity_matrix_reduces_per_resume():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("sklearn")
+    from utils.scoring import cosine_similarity_matrix
+
+    chunks = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])  # resume 0: two chunks, resume 1: none, resume 2: one
+    jds = np.array([[1.0, 0.0], [0.0, 2.0]])
+    sims = cosine_similarity_matrix(chunks, [2, 0, 1], jds)
+    assert sims.shape == (3, 2)
+    assert np.allclose(sims[0], [1.0, 1.0])
+    assert np.allclose(sims[1], [0.0, 0.0])
+    assert np.allclose(sims[2], [2 ** -0.5, 2 ** -0.5])
+    top2 = cosine_similarity_matrix(chunks, [2, 0, 1], jds, top_k=2)
+    assert np.allclose(top2[0], [0.5, 0.5])
+
+def test_job_keyword_index_matches_keyword_score():
+    from utils.scoring import JobKeywordIndex
+
+    jd = "We need experience with Python and AWS and Docker and Kubernetes"
+    resumes = ["Python, SQL, AWS, k8s", "Docker expert", ""]
+    index = JobKeywordIndex(jd)
+    assert index.score_many(resumes) == [keyword_score(r, jd)[0] for r in resumes]
+
+    weighted = JobKeywordIndex(jd, weights={"python": 3.0}, synonyms={"kubernetes": ["k8s"]})
+    score, details = weighted.score(resumes[0])
+    assert details["matched"] == ["kubernetes", "python"]
+    assert score == 100.0 * 4.0 / (len(weighted.keywords) + 2.0)
+
+def test_revised_resume_only_recomputes_changed_chunks(monkeypatch):
+    pytest.importorskip("sklearn")
+    import main
+    from embeddings.tfidf import new_vectorizer
+    from extractor.text_utils import token_chunk_spans
+    from utils.chunk_cache import ChunkCache
+    from utils.scoring import semantic_score_local
+
+    cache = ChunkCache()
+    monkeypatch.setattr(main, "get_chunk_cache", lambda: cache)
+    lines = [f"Experience item {i}: built python services on kubernetes and aws" for i in range(400)]
+    jd = "python kubernetes terraform django"
+    original = "\n".join(lines)
+    revised = "\n".join(lines[:-1] + ["Experience item 399: led django and terraform migrations"])
+
+    for text in (original, revised):
+        spans, chunks = main.split_chunks(text)
+        assert main.keyword_match(chunks, jd) == keyword_score(text, jd)
+    # the edit only touches the last chunk: the other token sets and the compiled JD are reused
+    assert len(chunks) > 2 and cache.stats()["hits"] == (len(chunks) - 1) + 1
+
+    vectorizer = new_vectorizer().fit(lines)
+    monkeypatch.setattr(main, "get_shared_vectorizer", lambda: vectorizer)
+    spans = list(token_chunk_spans(revised))
+    chunks = [revised[s:e] for s, e in spans]
+    expected = semantic_score_local(vectorizer, chunks, jd, spans=spans)
+    assert main.semantic_match(chunks, spans, jd) == expected
+    assert main.semantic_match(chunks, spans, jd) == expected
+
+
+def test_chunk_cache_can_be_switched_off(monkeypatch):
+    from utils import chunk_cache
+
+    monkeypatch.setattr(chunk_cache, "CHUNK_CACHE_ENABLED", False)
+    cache = chunk_cache.ChunkCache()
+    cache.set("tokens", "k", {"python"})
+    assert cache.get("tokens", "k") is None
@@ -0,0 +1,122 @@
+# tests/test_service.py
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("aiohttp")
+from aiohttp import FormData
+from aiohttp.test_utils import TestClient, TestServer
+
+import service
+from service import AnalysisService, create_app
+
+
+class _SlowService(AnalysisService):
+    """Skips extraction and the LLM; each analysis waits until released."""
+
+    def __init__(self, **kwargs):
+        super().__init__(extract_concurrency=1, **kwargs)
+        self.gate = asyncio.Event()
+
+    async def extract(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    async def analyze_jobs(self, cleaned, job_descriptions, level=0, trace=None):
+        await self.gate.wait()
+        return [{"resume": cleaned, "jd": jd} for jd in job_descriptions]
+
+
+def _form(resumes, jds):
+    form = FormData()
+    for text in resumes:
+        form.add_field("resume", text.encode(), filename="resume.txt")
+    for jd in jds:
+        form.add_field("job_description", jd)
+    return form
+
+
+def test_saturated_service_returns_429_with_retry_after():
+    async def run():
+        service = _SlowService(queue_size=2)
+        async with TestClient(TestServer(create_app(service))) as client:
+            first = asyncio.ensure_future(client.post("/analyze", data=_form(["r1"], ["jd"])))
+            for _ in range(500):
+                if service.pending:
+                    break
+                await asyncio.sleep(0.01)
+            busy = await client.post("/batch", data=_form(["r2", "r3"], ["jd"]))
+            assert busy.status == 429
+            assert int(busy.headers["Retry-After"]) >= 1
+
+            service.gate.set()
+            assert (await (await first).json()) == {"resume": "r1", "jd": "jd"}
+            ok = await client.post("/batch", data=_form(["r2", "r3"], ["jd"]))
+            assert [row["result"]["resume"] for row in await ok.json()] == ["r2", "r3"]
+            assert (await (await client.get("/health")).json())["pending"] == 0
+            assert "# TYPE resume_stage_duration_seconds histogram" in await (await client.get("/metrics")).text()
+
+    asyncio.run(run())
+
+
+def test_batch_larger_than_the_queue_is_rejected():
+    async def run():
+        async with TestClient(TestServer(create_app(_SlowService(queue_size=2)))) as client:
+            resp = await client.post("/batch", data=_form(["r1", "r2", "r3"], ["jd"]))
+            assert resp.status == 400
+            assert "Retry-After" not in resp.headers
+
+    asyncio.run(run())
+
+
+def test_oversized_upload_removes_saved_files(monkeypatch):
+    saved = []
+    real = tempfile.NamedTemporaryFile
+
+    def recording(*args, **kwargs):
+        tmp = real(*args, **kwargs)
+        saved.append(tmp.name)
+        return tmp
+
+    monkeypatch.setattr(service, "MAX_UPLOAD_BYTES", 10)
+    monkeypatch.setattr(service.tempfile, "NamedTemporaryFile", recording)
+
+    async def run():
+        async with TestClient(TestServer(create_app(_SlowService()))) as client:
+            resp = await client.post("/batch", data=_form(["short", "x" * 100], ["jd"]))
+            assert resp.status == 413
+
+    asyncio.run(run())
+    assert len(saved) == 2 and not any(os.path.exists(p) for p in saved)
+
+
+def test_batch_makes_resume_only_llm_calls_once_per_resume(monkeypatch):
+    pytest.importorskip("sklearn")
+    import main
+    from chains.analysis_chain import Analyzer
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    analyzer = Analyzer(provider="google", cache=False)
+    monkeypatch.setattr(main, "get_analyzer", lambda provider, fused=False: analyzer)
+    prompts = []
+
+    def fake_call(prompt, key, schema=None):
+        prompts.append(prompt)
+        return '{"match_pct": 60, "explanation": "ok", "skills": ["python"], "experience_bullets": []}'
+
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", fake_call)
+
+    async def run():
+        service = AnalysisService(provider="google", fused=False, extract_concurrency=1)
+        async with TestClient(TestServer(create_app(service))) as client:
+            resp = await client.post("/batch", data=_form(["Python developer\nSkills: python, sql"],
+                                                          ["python job", "sql job"]))
+            assert resp.status == 200
+            return await resp.json()
+
+    rows = asyncio.run(run())
+    assert [(row["resume_index"], row["jd_index"]) for row in rows] == [(0, 0), (0, 1)]
+    assert all(row["result"]["match_chain"]["match_pct"] == 60 for row in rows)
+    assert len(prompts) == 3 + 2  # summary, skills, strengths once; one match per JD
@@ -0,0 +1,48 @@
+# tests/test_tracing.py
+import contextvars
+import threading
+
+from chains.analysis_chain import Analyzer
+from chains.cache import ResponseCache
+from utils.tracing import Histogram, Trace, span
+
+
+def _timed(name):
+    with span(name):
+        pass
+
+
+def test_trace_collects_spans_from_copied_contexts():
+    trace = Trace()
+    with trace.activate():
+        _timed("clean")
+        ctx = contextvars.copy_context()
+    _timed("outside")  # no active trace: histogram only
+    worker = threading.Thread(target=ctx.run, args=(_timed, "chunk"))
+    worker.start()
+    worker.join()
+    assert set(trace.timings()) == {"clean", "chunk", "total"}
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("stage_seconds", "help", "stage", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        h.observe("extract", value)
+    lines = h.render()
+    assert 'stage_seconds_bucket{stage="extract",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="extract",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="extract",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{stage="extract"} 3' in lines
+
+
+def test_llm_calls_report_tokens_and_cache_hits(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr("chains.analysis_chain._call_google_api", lambda prompt, key, schema=None: "a summary")
+    analyzer = Analyzer(provider="google", cache=ResponseCache(path=None))
+    trace = Trace()
+    with trace.activate():
+        analyzer.summarize("resume text")
+        analyzer.summarize("resume text")
+    first, second = trace.llm_calls()
+    assert first["prompt"] == "summary" and first["cached"] is False and first["completion_tokens"] > 0
+    assert second["cached"] is True and "prompt_tokens" not in second
@@ -0,0 +1,54 @@
+"""Benchmark every available extraction backend on sample files.
+
+Usage:
+    python tools/bench_extractors.py resumes/*.pdf resumes/*.docx --repeat 5
+
+Reports pages/sec (PDF only) and MB/sec per backend and format.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractor.registry import available_backends, sniff_format
+
+
+def _pdf_pages(path):
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(path).pages)
+    except ImportError:
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("files", nargs="+")
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+# (format, backend) -> [seconds, bytes, pages, files]
+totals = {}
+for path in args.files:
+    fmt = sniff_format(path)
+    size = os.path.getsize(path)
+    pages = _pdf_pages(path) if fmt == "pdf" else 0
+    for backend in available_backends(fmt):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            backend.extract(path)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        t = totals.setdefault((fmt, backend.name), [0.0, 0, 0, 0])
+        t[0] += elapsed
+        t[1] += size
+        t[2] += pages
+        t[3] += 1
+
+print(f"{'format':<6} {'backend':<12} {'files':>5} {'pages/sec':>10} {'MB/sec':>8}")
+for (fmt, name), (seconds, size, pages, files) in sorted(totals.items()):
+    pages_per_sec = f"{pages / seconds:.1f}" if pages and seconds else "-"
+    mb_per_sec = size / 1e6 / seconds if seconds else float("inf")
+    print(f"{fmt:<6} {name:<12} {files:>5} {pages_per_sec:>10} {mb_per_sec:>8.2f}")
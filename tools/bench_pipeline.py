@@ -0,0 +1,342 @@
+"""End-to-end benchmark of the analysis pipeline against a fake LLM provider.
+
+Usage:
+    python tools/bench_pipeline.py --resumes 30 --latency 0.2 --concurrency 4
+    python tools/bench_pipeline.py --update-baseline   # after an intentional change
+
+A synthetic corpus of PDF, DOCX and TXT resumes is generated, and analyze_resume_file
+is run on it with the Gemini client pointed at tools/fake_llm_server.py (configurable
+latency, 500 and 429 injection). Each phase runs in a fresh process so its peak RSS is
+its own:
+
+    extract      load_resume_text + clean_text
+    score        chunking, keyword and semantic scoring
+    end_to_end   analyze_resume_file, `--concurrency` resumes at a time
+
+Each phase is run `--repeat` times and the fastest run is reported: p50/p95 latency,
+resumes/sec and peak RSS per phase, plus p50/p95 per traced stage of end_to_end. The
+script exits with status 1 when a phase is more than `--tolerance` worse than
+tools/bench_baseline.json (baselines are machine-specific; regenerate them on the
+machine that runs the comparison).
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(ROOT, "tools", "bench_baseline.json")
+# (metric, True if higher is better) compared against the baseline
+CHECKED_METRICS = [("p95_ms", False), ("resumes_per_sec", True), ("peak_rss_mb", False)]
+
+_SKILLS = ["Python", "Java", "Go", "SQL", "AWS", "Docker", "Kubernetes", "Terraform", "React", "Django",
+           "Spark", "Kafka", "PostgreSQL", "Redis", "Airflow", "TensorFlow", "PyTorch", "GraphQL", "Linux", "CI/CD"]
+_VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Shipped", "Scaled", "Maintained"]
+_THINGS = ["a payments service", "the data platform", "an internal API gateway", "search ranking",
+           "the CI pipeline", "a recommendation engine", "billing reports", "the mobile backend"]
+JOB_DESCRIPTION = (
+    "Senior Backend Engineer. We are looking for an engineer with strong Python and SQL skills, "
+    "experience running services on AWS with Docker and Kubernetes, and a track record of "
+    "designing scalable APIs. Experience with Kafka, Redis and PostgreSQL is a plus."
+)
+
+
+# --- synthetic corpus -----------------------------------------------------------------
+
+def synthetic_resume(rng: random.Random, n_jobs: int) -> str:
+    lines = [f"Candidate {rng.randint(1000, 9999)}", "candidate@example.com", "",
+             "Summary", f"Software engineer with {rng.randint(2, 15)} years of experience.", "",
+             "Skills", ", ".join(rng.sample(_SKILLS, 8)), "", "Experience"]
+    for j in range(n_jobs):
+        lines.append(f"Engineer, Company {j} ({2010 + j}-{2011 + j})")
+        for _ in range(4):
+            lines.append(f"- {rng.choice(_VERBS)} {rng.choice(_THINGS)} using {rng.choice(_SKILLS)} "
+                         f"and {rng.choice(_SKILLS)}, improving latency by {rng.randint(10, 80)}%.")
+        lines.append("")
+    lines += ["Education", "B.Sc. Computer Science, State University", "",
+              "Projects", f"Open source contributor to {rng.choice(_SKILLS)} tooling."]
+    return "\n".join(lines)
+
+
+def write_pdf(path: str, text: str, lines_per_page: int = 45) -> None:
+    """Minimal PDF with a Helvetica text layer, one page per `lines_per_page` lines."""
+    lines = text.split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    n = len(pages)
+    # objects: 1 catalog, 2 pages, 3 font, then (page, contents) per page
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>",
+               3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        body = "".join("(" + l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T* "
+                       for l in page_lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 750 Td {body}ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {n} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{objects[obj_id]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for obj_id in sorted(objects):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path: str, text: str) -> None:
+    """Minimal DOCX: one paragraph per line."""
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+                         for line in text.split("\n"))
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml",
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    '<Override PartName="/word/document.xml" ContentType="application/'
+                    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        zf.writestr("_rels/.rels",
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                    'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        zf.writestr("word/document.xml",
+                    f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{ns}"><w:body>{paragraphs}</w:body></w:document>')
+
+
+def make_corpus(directory: str, n: int, seed: int = 0) -> list:
+    """`n` resumes rotating through PDF, DOCX and TXT, 2-8 jobs each."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n):
+        text = synthetic_resume(rng, rng.randint(2, 8))
+        ext = (".pdf", ".docx", ".txt")[i % 3]
+        path = os.path.join(directory, f"resume_{i:04d}{ext}")
+        if ext == ".pdf":
+            write_pdf(path, text)
+        elif ext == ".docx":
+            write_docx(path, text)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        paths.append(path)
+    return paths
+
+
+# --- phases (each runs in its own process) --------------------------------------------
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # not available on Windows
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+
+def _phase_extract(paths, concurrency):
+    from extractor.text_utils import clean_text
+    from main import load_resume_text
+    latencies = []
+    for path in paths:
+        start = time.perf_counter()
+        clean_text(load_resume_text(path))
+        latencies.append(time.perf_counter() - start)
+    return latencies, {}
+
+
+def _phase_score(paths, concurrency):
+    from extractor.text_utils import clean_text
+    from main import load_resume_text, semantic_match, split_chunks
+    from utils.scoring import keyword_score
+    cleaned = [clean_text(load_resume_text(p)) for p in paths]
+    latencies = []
+    for text in cleaned:
+        start = time.perf_counter()
+        spans, chunks = split_chunks(text)
+        keyword_score(text, JOB_DESCRIPTION)
+        semantic_match(chunks, spans, JOB_DESCRIPTION)
+        latencies.append(time.perf_counter() - start)
+    return latencies, {}
+
+
+def _phase_end_to_end(paths, concurrency):
+    from main import analyze_resume_file
+
+    def one(path):
+        start = time.perf_counter()
+        result = analyze_resume_file(path, JOB_DESCRIPTION, provider="google")
+        return time.perf_counter() - start, result.timings
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(one, paths))
+    stages = {}
+    for _, timings in runs:
+        for stage, ms in timings.items():
+            stages.setdefault(stage, []).append(ms / 1000.0)
+    return [latency for latency, _ in runs], stages
+
+
+PHASES = {"extract": _phase_extract, "score": _phase_score, "end_to_end": _phase_end_to_end}
+
+
+def _run_phase(name, paths, concurrency, repeat):
+    """Best (fastest wall time) of `repeat` runs, after an untimed warm-up so first-use
+    imports and model loading are not measured."""
+    PHASES[name](paths[:1], 1)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        latencies, stages = PHASES[name](paths, concurrency)
+        wall = time.perf_counter() - start
+        if best is None or wall < best[2]:
+            best = (latencies, stages, wall)
+    return best + (_peak_rss_mb(),)
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(pct / 100.0 * len(ordered)))) - 1]
+
+
+def summarize(latencies, wall, peak_rss_mb) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "resumes_per_sec": round(len(latencies) / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+    }
+
+
+def run_benchmark(paths, concurrency: int = 4, phases=tuple(PHASES), repeat: int = 3) -> dict:
+    """Run each phase in a fresh spawned process (env must already point at the fake server)."""
+    report = {}
+    ctx = multiprocessing.get_context("spawn")
+    for name in phases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            latencies, stages, wall, rss = pool.submit(_run_phase, name, paths, concurrency, repeat).result()
+        report[name] = summarize(latencies, wall, rss)
+        if stages:
+            report[name]["stages"] = {stage: {"p50_ms": round(percentile(v, 50) * 1000, 2),
+                                              "p95_ms": round(percentile(v, 95) * 1000, 2)}
+                                      for stage, v in sorted(stages.items())}
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float = 10.0) -> list:
+    """Human-readable regressions of `report` against `baseline`. Latencies must also be
+    `min_delta_ms` worse in absolute terms, so millisecond-scale jitter doesn't fail a run."""
+    regressions = []
+    for phase, base in baseline.get("phases", {}).items():
+        current = report.get(phase)
+        if current is None:
+            continue
+        for metric, higher_is_better in CHECKED_METRICS:
+            was, now = base.get(metric), current.get(metric)
+            if not was or now is None:
+                continue
+            worse = now < was * (1 - tolerance) if higher_is_better else now > was * (1 + tolerance)
+            if metric.endswith("_ms"):
+                worse = worse and now - was > min_delta_ms
+            if worse:
+                regressions.append(f"{phase}.{metric}: {now} vs baseline {was} (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=30, help="synthetic resumes to generate")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent analyses in end_to_end")
+    parser.add_argument("--phases", nargs="+", default=list(PHASES), choices=list(PHASES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per phase; the fastest is reported")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of LLM calls failing with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression (sub-10ms phases are noisy)")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0, help="absolute slack for latency metrics")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    from tools.fake_llm_server import FakeLLMServer
+
+    with tempfile.TemporaryDirectory() as corpus_dir, \
+            FakeLLMServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate_limit_rate=args.rate_limit_rate, seed=args.seed) as server:
+        # the phase processes inherit this environment
+        os.environ.update({
+            "GEMINI_API_BASE": server.url + "/v1beta",
+            "GEMINI_API_KEY": "benchmark",
+            "LLM_CACHE": "0",          # every call must reach the (fake) provider
+            "CHUNK_CACHE": "0",        # --repeat runs must not reuse the previous run's work
+            "LLM_RPM": "1000000",      # the fake server has no quota
+            "LLM_TPM": "1000000000",
+        })
+        os.environ.pop("VECTORSTORE_DIR", None)
+        paths = make_corpus(corpus_dir, args.resumes, seed=args.seed)
+        report = run_benchmark(paths, concurrency=args.concurrency, phases=args.phases, repeat=args.repeat)
+        report_doc = {"config": {k: v for k, v in vars(args).items()
+                                 if k not in ("baseline", "json", "update_baseline", "tolerance", "min_delta_ms")},
+                      "llm_statuses": {str(k): v for k, v in sorted(server.statuses.items())},
+                      "phases": report}
+
+    print(f"{'phase':<28}{'p50 ms':>10}{'p95 ms':>10}{'resumes/s':>11}{'peak RSS MB':>13}")
+    for phase, m in report.items():
+        print(f"{phase:<28}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['resumes_per_sec']:>11}{str(m['peak_rss_mb']):>13}")
+        for stage, s in m.get("stages", {}).items():
+            print(f"  {stage:<26}{s['p50_ms']:>10}{s['p95_ms']:>10}")
+    print(f"fake LLM responses by status: {report_doc['llm_statuses']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report_doc, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report_doc, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --update-baseline)")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report_doc["config"]:
+        print("WARNING: baseline was recorded with different settings; comparison may be meaningless")
+    regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("\nPERFORMANCE REGRESSION:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Maintain a candidate index and search it by job description.
+
+Usage:
+    python tools/candidate_index.py --index candidates/ add resumes/
+    python tools/candidate_index.py --index candidates/ delete resumes/old.pdf
+    python tools/candidate_index.py --index candidates/ search --jd jd.txt -k 50
+
+Resumes are keyed by their path. A new index takes the model from EMBEDDING_MODEL_PATH
+(see tools/fit_embeddings.py) and keeps its own copy.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import RESUME_EXTS, expand_paths
+from embeddings.candidate_index import CandidateIndex
+from extractor.text_utils import clean_text
+from main import load_resume_text, split_chunks
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--index", required=True, help="index directory")
+commands = parser.add_subparsers(dest="command", required=True)
+add = commands.add_parser("add", help="add or replace resumes")
+add.add_argument("resumes", nargs="+", help="resume files, directories or globs")
+add.add_argument("--batch-size", type=int, default=500, help="resumes per append")
+delete = commands.add_parser("delete", help="remove resumes")
+delete.add_argument("resumes", nargs="+")
+search = commands.add_parser("search", help="rank the pool for a job description")
+search.add_argument("--jd", required=True, help="job description file")
+search.add_argument("-k", type=int, default=50)
+args = parser.parse_args()
+
+index = CandidateIndex(args.index)
+if args.command == "add":
+    pending, added = [], 0
+    for path in expand_paths(args.resumes, RESUME_EXTS):
+        try:
+            _, chunks = split_chunks(clean_text(load_resume_text(path)))
+        except Exception as e:
+            print(f"skipping {path}: {e}")
+            continue
+        pending.append((path, chunks, {"file": os.path.basename(path)}))
+        if len(pending) >= args.batch_size:
+            added += index.add_many(pending)
+            pending = []
+    added += index.add_many(pending)
+    print(f"Indexed {added} resumes ({len(index)} in {args.index})")
+elif args.command == "delete":
+    removed = sum(index.delete(os.path.normpath(path)) for path in args.resumes)
+    print(f"Removed {removed} resumes ({len(index)} in {args.index})")
+else:
+    with open(args.jd, "r", encoding="utf-8") as f:
+        jd = clean_text(f.read())
+    for rank, hit in enumerate(index.search(jd, k=args.k), 1):
+        print(json.dumps(dict(hit, rank=rank)))
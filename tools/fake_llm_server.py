@@ -0,0 +1,242 @@
+"""Local stand-in for the Gemini API and the OpenAI/Gemini batch endpoints.
+
+Usage:
+    python tools/fake_llm_server.py --port 8765 --latency 0.5 --error-rate 0.02 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 GEMINI_API_BASE=http://127.0.0.1:8765/v1beta ...
+
+Online calls (generateContent and streamGenerateContent) wait `latency` seconds plus up
+to `jitter`, and fail with a 500 or a 429 (with Retry-After) at the given rates; `faults`
+is a list of statuses returned first, for scripted tests. Randomness is seeded, so runs
+are reproducible. Batch jobs finish after `polls_until_done` status checks. Every prompt
+is answered by `responder(prompt)`; the default returns a canned reply that parses for
+each prompt type.
+"""
+import argparse
+import collections
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable
+
+
+def default_responder(prompt: str) -> str:
+    if "Return a single JSON object" in prompt:
+        return json.dumps({"summary": "Fake summary.", "skills": {"skills": ["python"], "experience_bullets": []},
+                           "strengths": "Fake strengths.", "match_pct": 50, "explanation": "Fake explanation."})
+    if "skills (list)" in prompt:
+        return json.dumps({"skills": ["python"], "experience_bullets": []})
+    if "match_pct" in prompt:
+        return json.dumps({"match_pct": 50, "explanation": "Fake explanation."})
+    if prompt.startswith("Summarize"):
+        return "Fake summary."
+    return "Fake strengths."
+
+
+def _multipart_file(body: bytes, content_type: str) -> bytes:
+    """Contents of the first file part of a multipart/form-data body."""
+    boundary = re.search(r"boundary=([^;]+)", content_type).group(1).strip('"').encode()
+    for part in body.split(b"--" + boundary):
+        head, _, data = part.partition(b"\r\n\r\n")
+        if b"filename=" in head:
+            return data.rsplit(b"\r\n", 1)[0]
+    return b""
+
+
+class FakeLLMServer:
+    def __init__(self, responder: Callable[[str], str] = default_responder, polls_until_done: int = 1,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 0.1, faults: Iterable[int] = (),
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._faults = collections.deque(faults)
+        self._rng = random.Random(seed)
+        self.statuses = collections.Counter()  # online responses by status code
+        self.files: Dict[str, bytes] = {}
+        self.jobs: Dict[str, dict] = {}
+        self.submitted = []  # prompts per job, in submission order
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _new_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}{next(self._ids)}"
+
+    # --- Gemini online ---
+
+    def _online_delay_and_fault(self) -> tuple:
+        """(seconds to wait, injected status or None) for one online call."""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self._faults:
+                status = self._faults.popleft()
+            else:
+                draw = self._rng.random()
+                status = 429 if draw < self.rate_limit_rate else 500 if draw < self.rate_limit_rate + self.error_rate else None
+            self.statuses[status or 200] += 1
+        return delay, status
+
+    def _tick(self, job: dict) -> bool:
+        """Count a status check; True once the job is finished."""
+        job["polls"] += 1
+        return job["polls"] >= self.polls_until_done
+
+    # --- OpenAI ---
+
+    def _openai_upload(self, body: bytes, content_type: str) -> dict:
+        file_id = self._new_id("file-")
+        self.files[file_id] = _multipart_file(body, content_type)
+        return {"id": file_id, "object": "file", "purpose": "batch"}
+
+    def _openai_create(self, request: dict) -> dict:
+        lines = [json.loads(l) for l in self.files[request["input_file_id"]].decode().splitlines() if l.strip()]
+        self.submitted.append([l["body"]["messages"][0]["content"] for l in lines])
+        job = {"id": self._new_id("batch_"), "object": "batch", "status": "in_progress", "polls": 0,
+               "lines": lines, "output_file_id": None}
+        self.jobs[job["id"]] = job
+        return self._openai_view(job)
+
+    def _openai_view(self, job: dict) -> dict:
+        return {k: job[k] for k in ("id", "object", "status", "output_file_id")}
+
+    def _openai_poll(self, job_id: str) -> dict:
+        job = self.jobs[job_id]
+        if job["status"] == "in_progress" and self._tick(job):
+            out = []
+            for line in job["lines"]:
+                text = self.responder(line["body"]["messages"][0]["content"])
+                out.append(json.dumps({"custom_id": line["custom_id"], "error": None, "response": {
+                    "status_code": 200, "body": {"choices": [{"message": {"role": "assistant", "content": text}}]},
+                }}))
+            job["output_file_id"] = self._new_id("file-")
+            self.files[job["output_file_id"]] = "\n".join(out).encode()
+            job["status"] = "completed"
+        return self._openai_view(job)
+
+    # --- Gemini ---
+
+    def _google_create(self, request: dict) -> dict:
+        items = request["batch"]["input_config"]["requests"]["requests"]
+        self.submitted.append([item["request"]["contents"][0]["parts"][0]["text"] for item in items])
+        name = self._new_id("batches/")
+        self.jobs[name] = {"name": name, "items": items, "polls": 0, "done": False}
+        return {"name": name, "metadata": {"state": "BATCH_STATE_PENDING"}}
+
+    def _google_poll(self, name: str) -> dict:
+        job = self.jobs[name]
+        if not job["done"] and self._tick(job):
+            job["done"] = True
+        if not job["done"]:
+            return {"name": name, "metadata": {"state": "BATCH_STATE_RUNNING"}}
+        responses = [{
+            "response": {"candidates": [{"content": {"parts": [{"text": self.responder(
+                item["request"]["contents"][0]["parts"][0]["text"])}]}}]},
+            "metadata": item["metadata"],
+        } for item in job["items"]]
+        return {"name": name, "done": True, "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+                "response": {"inlinedResponses": {"inlinedResponses": responses}}}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, status=200, raw=False):
+                body = payload if raw else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _online(self, path: str, body: bytes):
+                delay, status = server._online_delay_and_fault()
+                time.sleep(delay)
+                if status == 429:
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if status is not None:
+                    return self._send({"error": {"code": status, "message": "injected fault"}}, status=status)
+                text = server.responder(json.loads(body)["contents"][0]["parts"][0]["text"])
+                if path.endswith(":generateContent"):
+                    return self._send({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+                # streamGenerateContent?alt=sse: one event per word, connection closed at the end
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for piece in re.findall(r"\S+\s*", text) or [text]:
+                    event = {"candidates": [{"content": {"parts": [{"text": piece}]}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = self.path.split("?", 1)[0]
+                if path.startswith("/v1beta/models/") and path.endswith((":generateContent", ":streamGenerateContent")):
+                    return self._online(path, body)
+                if path == "/v1/files":
+                    return self._send(server._openai_upload(body, self.headers["Content-Type"]))
+                if path == "/v1/batches":
+                    return self._send(server._openai_create(json.loads(body)))
+                if path.startswith("/v1beta/models/") and path.endswith(":batchGenerateContent"):
+                    return self._send(server._google_create(json.loads(body)))
+                self._send({"error": f"unknown endpoint {path}"}, status=404)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                m = re.fullmatch(r"/v1/files/([^/]+)/content", path)
+                if m and m.group(1) in server.files:
+                    return self._send(server.files[m.group(1)], raw=True)
+                m = re.fullmatch(r"/v1/batches/([^/]+)", path)
+                if m and m.group(1) in server.jobs:
+                    return self._send(server._openai_poll(m.group(1)))
+                m = re.fullmatch(r"/v1beta/(batches/[^/]+)", path)
+                if m and m.group(1) in server.jobs:
+                    return self._send(server._google_poll(m.group(1)))
+                self._send({"error": f"unknown endpoint {path}"}, status=404)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--polls", type=int, default=1, help="status checks before a batch job finishes")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each online response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of online calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of online calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with FakeLLMServer(polls_until_done=args.polls, latency=args.latency, jitter=args.jitter,
+                       error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                       retry_after=args.retry_after, seed=args.seed, host=args.host, port=args.port) as server:
+        print(f"Fake LLM server on {server.url} (OpenAI: {server.url}/v1, Gemini: {server.url}/v1beta)")
+        server._thread.join()
@@ -0,0 +1,38 @@
+"""Fit the shared TF-IDF embedding model on a reference corpus of resumes and JDs.
+
+Usage:
+    python tools/fit_embeddings.py --resumes resumes/ --jds jds/ --out tfidf_model.joblib
+
+Then set EMBEDDING_MODEL_PATH=tfidf_model.joblib so every analysis uses the same vector space.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import JD_EXTS, RESUME_EXTS, expand_paths
+from embeddings.tfidf import fit_embedding_model
+from extractor.text_utils import clean_text
+from main import load_resume_text
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--resumes", nargs="+", default=[])
+parser.add_argument("--jds", nargs="+", default=[])
+parser.add_argument("--out", default="tfidf_model.joblib")
+args = parser.parse_args()
+
+texts = []
+for path in expand_paths(args.resumes, RESUME_EXTS):
+    try:
+        texts.append(clean_text(load_resume_text(path)))
+    except Exception as e:
+        print(f"skipping {path}: {e}")
+for path in expand_paths(args.jds, JD_EXTS):
+    with open(path, "r", encoding="utf-8") as f:
+        texts.append(clean_text(f.read()))
+
+if not texts:
+    sys.exit("no documents found")
+vectorizer = fit_embedding_model(texts, args.out)
+print(f"Fitted on {len(texts)} documents ({len(vectorizer.vocabulary_)} terms) -> {args.out}")
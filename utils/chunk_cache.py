@@ -0,0 +1,81 @@
+# utils/chunk_cache.py
+"""Per-chunk results reused across revisions of a document.
+
+Revised resumes usually differ by a few lines, so most of their chunks are unchanged.
+Derived values (token sets, embedding rows, the cleaned text of an uploaded file) are
+cached under a content fingerprint and only the changed parts are recomputed.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Sequence
+
+CHUNK_CACHE_ENTRIES = int(os.getenv("CHUNK_CACHE_ENTRIES", "2048"))
+# CHUNK_CACHE=0 turns every chunk cache off (e.g. for benchmarks that must not reuse work)
+CHUNK_CACHE_ENABLED = os.getenv("CHUNK_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def fingerprint(data) -> str:
+    """Content hash of a str or bytes."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChunkCache:
+    """Thread-safe LRU of (kind, fingerprint) -> value."""
+
+    def __init__(self, max_entries: int = CHUNK_CACHE_ENTRIES):
+        self.max_entries = max_entries if CHUNK_CACHE_ENABLED else 0
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: Hashable, key: str):
+        with self._lock:
+            value = self._lru.get((kind, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._lru.move_to_end((kind, key))
+            self.hits += 1
+            return value
+
+    def set(self, kind: Hashable, key: str, value) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[(kind, key)] = value
+            self._lru.move_to_end((kind, key))
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get_many(self, kind: Hashable, texts: Sequence[str], compute: Callable[[List[str]], List]) -> List:
+        """Values for `texts`, calling compute() once with only the texts not cached yet."""
+        keys = [fingerprint(t) for t in texts]
+        values = [self.get(kind, k) for k in keys]
+        missing = [i for i, v in enumerate(values) if v is None]
+        if missing:
+            for i, value in zip(missing, compute([texts[i] for i in missing])):
+                values[i] = value
+                self.set(kind, keys[i], value)
+        return values
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._lru), "hits": self.hits, "misses": self.misses}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_chunk_cache() -> ChunkCache:
+    """Process-wide chunk cache."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ChunkCache()
+        return _default_cache
@@ -0,0 +1,242 @@
+# utils/results.py
+"""Typed analysis results.
+
+The LLM layer builds Skills and Match straight from the model's JSON, and
+build_result assembles an AnalysisResult. to_dict() gives the JSON shape used by
+downloads, the HTTP service and batch outputs; optional fields are left out when they
+are empty. dumps() uses orjson when it is installed and falls back to compact json.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: faster, smaller output
+    orjson = None
+
+
+def _drop_empty(d: Dict) -> Dict:
+    return {k: v for k, v in d.items() if v is not None}
+
+
+def _str_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+@dataclass(slots=True)
+class Skills:
+    skills: List[str] = field(default_factory=list)
+    experience_bullets: List[str] = field(default_factory=list)
+    raw: Optional[str] = None  # model output that was not valid JSON
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Skills":
+        return cls(_str_list(data.get("skills")),
+                   _str_list(data.get("experience_bullets", data.get("experience"))),
+                   data.get("raw"))
+
+    def to_dict(self) -> Dict:
+        return _drop_empty({"skills": self.skills, "experience_bullets": self.experience_bullets, "raw": self.raw})
+
+
+@dataclass(slots=True)
+class Match:
+    match_pct: Optional[float] = None
+    explanation: str = ""
+    raw: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Match":
+        pct = data.get("match_pct")
+        if isinstance(pct, bool) or not isinstance(pct, (int, float)):
+            pct = None
+        explanation = data.get("explanation")
+        return cls(pct, explanation if isinstance(explanation, str) else "", data.get("raw"))
+
+    def to_dict(self) -> Dict:
+        return _drop_empty({"match_pct": self.match_pct, "explanation": self.explanation, "raw": self.raw})
+
+
+_BULLET_RE = re.compile(r"^[•\-*\d.)\s]+")
+
+
+@dataclass(slots=True)
+class Insights:
+    """Strengths/weaknesses/tips parsed once from the free-text strengths section."""
+    strengths: List[str] = field(default_factory=list)
+    weaknesses: List[str] = field(default_factory=list)
+    tips: List[str] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, text: str) -> "Insights":
+        insights = cls()
+        section = None
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            lower = line.lower()
+            if "strength" in lower:
+                section = insights.strengths
+            elif "weakness" in lower or "suggestion" in lower or "improvement" in lower:
+                section = insights.weaknesses
+            elif "tip" in lower or "recommendation" in lower:
+                section = insights.tips
+            elif section is not None and line.startswith(("•", "-", "*", "1", "2", "3", "4", "5")):
+                item = _BULLET_RE.sub("", line).strip()
+                if item:
+                    section.append(item)
+        return insights
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Insights":
+        return cls(list(data.get("strengths", [])), list(data.get("weaknesses", [])), list(data.get("tips", [])))
+
+    def to_dict(self) -> Dict:
+        return {"strengths": self.strengths, "weaknesses": self.weaknesses, "tips": self.tips}
+
+
+@dataclass(slots=True)
+class KeywordScore:
+    pct: float
+    matched: List[str] = field(default_factory=list)
+    total_keywords: int = 0
+
+    @classmethod
+    def from_details(cls, pct: float, details: Dict) -> "KeywordScore":
+        return cls(pct, details.get("matched", []), details.get("total_keywords", 0))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KeywordScore":
+        return cls(data["pct"], data.get("matched", []), data.get("total_keywords", 0))
+
+    def to_dict(self) -> Dict:
+        return {"pct": self.pct, "matched": self.matched, "total_keywords": self.total_keywords}
+
+
+EXCERPT_CHARS = 120
+
+
+def _excerpt(text: Optional[str]) -> Optional[str]:
+    """`text` cut to at most EXCERPT_CHARS characters at a word boundary."""
+    if text is None or len(text) <= EXCERPT_CHARS:
+        return text
+    cut = text[:EXCERPT_CHARS - 1]
+    return (cut.rsplit(None, 1)[0] if " " in cut else cut) + "…"
+
+
+@dataclass(slots=True)
+class SemanticHit:
+    """One matching chunk: character offsets into the cleaned resume plus a short excerpt
+    of the chunk, or the whole chunk text when the index has no offsets (e.g. a FAISS
+    store persisted by an older version)."""
+    pct: float
+    score: float
+    start: Optional[int] = None
+    end: Optional[int] = None
+    text: Optional[str] = None
+
+    @classmethod
+    def from_detail(cls, detail: Dict) -> "SemanticHit":
+        if "start" in detail:
+            return cls(detail["pct"], detail["score"], detail["start"], detail["end"], _excerpt(detail.get("text")))
+        return cls(detail["pct"], detail["score"], text=detail.get("text"))
+
+    def to_dict(self) -> Dict:
+        return _drop_empty({"pct": self.pct, "score": self.score, "start": self.start, "end": self.end,
+                            "text": self.text})
+
+
+@dataclass(slots=True)
+class SemanticScore:
+    pct: float
+    hits: List[SemanticHit] = field(default_factory=list)
+
+    @classmethod
+    def from_details(cls, pct: float, details: List[Dict]) -> "SemanticScore":
+        return cls(pct, [SemanticHit.from_detail(d) for d in details])
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SemanticScore":
+        return cls(data["pct"], [SemanticHit.from_detail(h) for h in data.get("hits", [])])
+
+    def to_dict(self) -> Dict:
+        return {"pct": self.pct, "hits": [h.to_dict() for h in self.hits]}
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    summary: str
+    skills: Skills
+    strengths: str
+    match: Match
+    keyword: KeywordScore
+    semantic: SemanticScore
+    combined_match_pct: float
+    token_usage: Dict = field(default_factory=dict)
+    insights: Insights = None
+    timings: Optional[Dict[str, float]] = None
+    llm_calls: Optional[List[Dict]] = None
+
+    def __post_init__(self):
+        if self.insights is None:
+            self.insights = Insights.parse(self.strengths)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AnalysisResult":
+        return cls(
+            summary=data["summary"],
+            skills=Skills.from_dict(data["skills"]),
+            strengths=data["strengths"],
+            match=Match.from_dict(data["match_chain"]),
+            keyword=KeywordScore.from_dict(data["keyword_score"]),
+            semantic=SemanticScore.from_dict(data["semantic_score"]),
+            combined_match_pct=data["combined_match_pct"],
+            token_usage=data.get("token_usage", {}),
+            insights=Insights.from_dict(data["insights"]) if "insights" in data else None,
+            timings=data.get("timings"),
+            llm_calls=data.get("llm_calls"),
+        )
+
+    def to_dict(self) -> Dict:
+        return _drop_empty({
+            "summary": self.summary,
+            "skills": self.skills.to_dict(),
+            "strengths": self.strengths,
+            "insights": self.insights.to_dict(),
+            "match_chain": self.match.to_dict(),
+            "keyword_score": self.keyword.to_dict(),
+            "semantic_score": self.semantic.to_dict(),
+            "combined_match_pct": self.combined_match_pct,
+            "token_usage": self.token_usage,
+            "timings": self.timings,
+            "llm_calls": self.llm_calls,
+        })
+
+
+def _default(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """JSON bytes of results, or of plain containers holding them (e.g. batch rows)."""
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SERIALIZE_NUMPY
+        return orjson.dumps(obj, default=_default, option=(options | orjson.OPT_INDENT_2) if indent else options)
+    if indent:
+        return json.dumps(obj, default=_default, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_text(obj) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data) -> object:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
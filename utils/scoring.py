@@ -1,23 +1,92 @@
 # utils/scoring.py
 import re
-from typing import List, Tuple
-from collections import Counter
+from typing import Dict, Iterable, List, Tuple
 
+from utils.tracing import traced
+
+KEYWORD_WEIGHT = 0.4
+SEMANTIC_WEIGHT = 0.6
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def combined_score(keyword_pct: float, semantic_pct: float) -> float:
+    """Weighted blend of keyword and semantic scores used as the overall match."""
+    return (keyword_pct * KEYWORD_WEIGHT) + (semantic_pct * SEMANTIC_WEIGHT)
+
+class JobKeywordIndex:
+    """Keyword set of one job description, compiled once and reused for many resumes.
+
+    `weights` maps keywords to their importance (default 1.0); `synonyms` maps a keyword
+    to alternative spellings that also count as a match for it (e.g. {"kubernetes": ["k8s"]}).
+    """
+
+    def __init__(self, job_text: str, weights: Dict[str, float] = None,
+                 synonyms: Dict[str, Iterable[str]] = None, min_length: int = 4):
+        # We focus on keywords of at least `min_length` chars to reduce noise
+        self.keywords = frozenset(t for t in _TOKEN_RE.findall(job_text.lower()) if len(t) >= min_length)
+        weights = {k.lower(): w for k, w in (weights or {}).items()}
+        self.weights = {k: weights.get(k, 1.0) for k in self.keywords}
+        self.total_weight = sum(self.weights.values())
+        # token -> keyword it counts for
+        self._lookup = {k: k for k in self.keywords}
+        for keyword, alternatives in (synonyms or {}).items():
+            keyword = keyword.lower()
+            if keyword in self.keywords:
+                for alt in alternatives:
+                    self._lookup.setdefault(alt.lower(), keyword)
+
+    def matched_tokens(self, tokens) -> set:
+        """Keywords present in an already tokenized resume (see resume_tokens)."""
+        lookup = self._lookup
+        return {lookup[t] for t in tokens if t in lookup}
+
+    def matched(self, resume_text: str) -> set:
+        """Keywords present in `resume_text`, found in a single pass over its tokens."""
+        lookup = self._lookup
+        found = set()
+        remaining = len(self.keywords)
+        for m in _TOKEN_RE.finditer(resume_text.lower()):
+            keyword = lookup.get(m.group())
+            if keyword is not None and keyword not in found:
+                found.add(keyword)
+                remaining -= 1
+                if not remaining:
+                    break
+        return found
+
+    def score(self, resume_text: str) -> Tuple[float, dict]:
+        """Same contract as keyword_score: (score_percent, details)."""
+        if not self.keywords:
+            return 0.0, {"matched": [], "total_keywords": 0}
+        return self._score(self.matched(resume_text))
+
+    def score_tokens(self, tokens) -> Tuple[float, dict]:
+        """score() of a resume given as its token set."""
+        if not self.keywords:
+            return 0.0, {"matched": [], "total_keywords": 0}
+        return self._score(self.matched_tokens(tokens))
+
+    def _score(self, matched: set) -> Tuple[float, dict]:
+        score = 100.0 * sum(self.weights[k] for k in matched) / self.total_weight if self.total_weight else 0.0
+        return score, {"matched": sorted(matched), "total_keywords": len(self.keywords)}
+
+    def score_many(self, resume_texts: Iterable[str]) -> List[float]:
+        """Keyword score percentages for many resumes against this job description."""
+        return [self.score(text)[0] for text in resume_texts]
+
+def resume_tokens(text: str) -> frozenset:
+    """Lower-cased word tokens of a text, as JobKeywordIndex sees them.
+
+    Chunks split on whitespace, so the tokens of a text are the union of its chunks' tokens.
+    """
+    return frozenset(_TOKEN_RE.findall(text.lower()))
+
+@traced("score.keyword")
 def keyword_score(resume_text: str, job_text: str) -> Tuple[float, dict]:
     """Compute a simple keyword overlap score. Returns (score_percent, details)."""
-    def tokenize(s: str):
-        return re.findall(r"\w+", s.lower())
-
-    r_tokens = set(tokenize(resume_text))
-    j_tokens = set(tokenize(job_text))
-    # We focus on keywords longer than 3 chars to reduce noise
-    j_keywords = {t for t in j_tokens if len(t) > 3}
-    if not j_keywords:
-        return 0.0, {"matched": [], "total": 0}
-    matched = sorted(list(j_keywords & r_tokens))
-    score = 100.0 * len(matched) / len(j_keywords)
-    return score, {"matched": matched, "total_keywords": len(j_keywords)}
+    return JobKeywordIndex(job_text).score(resume_text)
 
+@traced("score.semantic")
 def semantic_score(vectorstore, resume_chunks: List[str], job_description: str, k: int = 5) -> Tuple[float, List[dict]]:
     """Do semantic similarity via vectorstore: for each job_description, search and compute simple normalized score.
     Returns (avg_score_percent, details)
@@ -33,8 +102,91 @@ def semantic_score(vectorstore, resume_chunks: List[str], job_description: str,
         # convert score (distance) to similarity estimate
         sim = 1.0 / (1.0 + math.exp(score))  # sigmoid-like mapping
         pct = sim * 100
-        details.append({"text": doc.page_content[:200], "score": float(score), "pct": pct})
+        detail = {"text": doc.page_content[:200], "score": float(score), "pct": pct}
+        # character offsets into the cleaned resume, when the index was built from spans
+        if "start" in doc.metadata:
+            detail["start"], detail["end"] = doc.metadata["start"], doc.metadata["end"]
+        details.append(detail)
         if pct > max_score:
             max_score = pct
     # use max_score as the semantic match
     return max_score, details
+
+@traced("score.semantic")
+def semantic_score_local(vectorizer, resume_chunks: List[str], job_description: str, k: int = 5,
+                         spans: List[Tuple[int, int]] = None, chunk_vectors=None) -> Tuple[float, List[dict]]:
+    """Same result as semantic_score over a FAISS index of `resume_chunks`, computed
+    directly with a fitted TF-IDF `vectorizer` (no vector store needed).
+
+    `chunk_vectors` are vectorizer.transform(resume_chunks), if already known."""
+    import numpy as np
+
+    if not resume_chunks:
+        return 0.0, []
+    if chunk_vectors is None:
+        chunk_vectors = vectorizer.transform(resume_chunks)
+    query = vectorizer.transform([job_description])
+    # squared L2 distance, as reported by FAISS IndexFlatL2
+    dots = (chunk_vectors @ query.T).toarray().ravel()
+    chunk_sq = np.asarray(chunk_vectors.multiply(chunk_vectors).sum(axis=1)).ravel()
+    distances = np.maximum(chunk_sq + query.multiply(query).sum() - 2.0 * dots, 0.0)
+
+    details = []
+    max_score = 0.0
+    for i in np.argsort(distances, kind="stable")[:k]:
+        score = float(distances[i])
+        pct = 100.0 / (1.0 + np.exp(score))
+        detail = {"text": resume_chunks[i][:200], "score": score, "pct": float(pct)}
+        if spans is not None:
+            detail["start"], detail["end"] = spans[i]
+        details.append(detail)
+        max_score = max(max_score, float(pct))
+    return max_score, details
+
+def cosine_similarity_matrix(chunk_vectors, chunk_counts: List[int], jd_vectors, top_k: int = 1):
+    """Resume-by-JD cosine similarity from chunk vectors with one sparse matmul.
+
+    `chunk_vectors` stacks the chunk rows of every resume in order, `chunk_counts[i]` is
+    the number of rows belonging to resume i. Each resume/JD cell is the max (top_k=1)
+    or the mean of the top_k chunk similarities. Resumes with no chunks score 0.
+    """
+    import numpy as np
+    from sklearn.preprocessing import normalize
+
+    n_resumes = len(chunk_counts)
+    n_jds = jd_vectors.shape[0]
+    out = np.zeros((n_resumes, n_jds), dtype=np.float32)
+    if chunk_vectors.shape[0] == 0 or n_jds == 0:
+        return out
+
+    sims = normalize(chunk_vectors) @ normalize(jd_vectors).T  # (n_chunks, n_jds)
+    sims = sims.toarray() if hasattr(sims, "toarray") else np.asarray(sims)
+
+    counts = np.asarray(chunk_counts)
+    nonempty = counts > 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+    if top_k <= 1:
+        out[nonempty] = np.maximum.reduceat(sims, starts, axis=0)
+    else:
+        for row, start, count in zip(np.flatnonzero(nonempty), starts, counts[nonempty]):
+            block = sims[start:start + count]
+            k = min(top_k, count)
+            out[row] = np.partition(block, count - k, axis=0)[count - k:].mean(axis=0)
+    return out
+
+def semantic_score_matrix(vectorizer, resumes_chunks: List[List[str]], jd_vectors, top_k: int = 1):
+    """Semantic match percentages for every resume against every JD.
+
+    Uses the same distance -> percent mapping as semantic_score (FAISS L2 distance between
+    unit vectors is 2 - 2*cos), so results are interchangeable; `jd_vectors` is
+    vectorizer.transform(job_descriptions), computed once and reused across resumes.
+    """
+    import numpy as np
+
+    all_chunks = [c for chunks in resumes_chunks for c in chunks]
+    chunk_vectors = vectorizer.transform(all_chunks)
+    cos = cosine_similarity_matrix(chunk_vectors, [len(c) for c in resumes_chunks], jd_vectors, top_k=top_k)
+    pct = 100.0 / (1.0 + np.exp(2.0 - 2.0 * cos))
+    # a resume without chunks has no match at all
+    pct[[i for i, c in enumerate(resumes_chunks) if not c]] = 0.0
+    return pct
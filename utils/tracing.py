@@ -0,0 +1,205 @@
+# utils/tracing.py
+"""Lightweight tracing: timed spans collected per analysis, plus process-wide histograms.
+
+    trace = Trace()
+    with trace.activate():
+        with span("extract", backend="pypdf"):
+            ...
+    trace.timings()  # {"extract": 12.3, "total": 12.5} in milliseconds
+
+Spans opened while no trace is active still feed the Prometheus histograms (see
+render_prometheus). With TRACING_OTEL=1 and opentelemetry-api installed, every span is
+also exported as an OpenTelemetry span.
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from typing import Dict, List
+
+TRACING_OTEL = os.getenv("TRACING_OTEL", "").lower() in ("1", "true", "yes")
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "ms")
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.ms = 0.0
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+class Trace:
+    """Finished spans of one analysis, from any thread that runs in its context."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Collect spans opened in the enclosed block (and in contexts copied from it)."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per span name (repeated spans are summed) and the trace's total so far."""
+        out: Dict[str, float] = {}
+        with self._lock:
+            for s in self.spans:
+                out[s.name] = out.get(s.name, 0.0) + s.ms
+        out = {name: round(ms, 2) for name, ms in out.items()}
+        out["total"] = round((time.perf_counter() - self._start) * 1000, 2)
+        return out
+
+    def llm_calls(self) -> List[Dict]:
+        """One entry per LLM call: prompt name, duration, token counts and cache hit flag."""
+        with self._lock:
+            return [dict(s.attrs, prompt=s.name[len("llm."):], ms=round(s.ms, 2))
+                    for s in self.spans if s.name.startswith("llm.")]
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str,
+                 buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, list] = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value_label: str, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(value_label)
+            if series is None:
+                series = self._series[value_label] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for value_label, counts in sorted(series.items()):
+            label = f'{self.label}="{value_label}"'
+            cumulative = 0
+            for le, n in zip(self.buckets + ("+Inf",), counts[:-1]):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {counts[-1]}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value_label: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[value_label] = self._values.get(value_label, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for value_label, value in sorted(values.items()):
+            lines.append(f'{self.name}{{{self.label}="{value_label}"}} {value}')
+        return lines
+
+
+STAGE_SECONDS = Histogram("resume_stage_duration_seconds", "Time spent per analysis stage", "stage")
+LLM_TOKENS = Counter("resume_llm_tokens_total", "LLM tokens sent and received", "kind")
+LLM_CALLS = Counter("resume_llm_calls_total", "LLM calls by response cache outcome", "cache")
+METRICS = [STAGE_SECONDS, LLM_TOKENS, LLM_CALLS]
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+_tracer = None
+
+
+def _otel_export(name: str, attrs: Dict, start_ns: int, end_ns: int) -> None:
+    global _tracer
+    try:
+        if _tracer is None:
+            from opentelemetry import trace as otel_trace
+            _tracer = otel_trace.get_tracer("resume-analyzer")
+        otel_span = _tracer.start_span(name, start_time=start_ns,
+                                       attributes={k: v for k, v in attrs.items() if v is not None})
+        otel_span.end(end_time=end_ns)
+    except ImportError:
+        pass
+
+
+def _finish(s: Span, seconds: float) -> None:
+    s.ms = seconds * 1000
+    STAGE_SECONDS.observe(s.name, seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(s)
+    if TRACING_OTEL:
+        end_ns = time.time_ns()
+        _otel_export(s.name, s.attrs, end_ns - int(seconds * 1e9), end_ns)
+
+
+def record(name: str, seconds: float, **attrs) -> Span:
+    """Add an already timed span (e.g. one that spans a generator's yields)."""
+    s = Span(name, attrs)
+    _finish(s, seconds)
+    return s
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block; yields the Span so attributes can be added as they are known."""
+    s = Span(name, attrs)
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        _finish(s, time.perf_counter() - start)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator